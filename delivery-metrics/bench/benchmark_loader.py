@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from generate_delivery_data import DeliveryDataGenerator
+from os.path import dirname, abspath
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# paths relative to the delivery-metrics directory
+BASE_DIR = dirname(dirname(abspath(__file__)))
+LOADER_PATH = BASE_DIR + "/src/loader/load_json.py"
+SCHEMA_PATH = BASE_DIR + "/sql/create_delivery_metrics_db.sql"
+
+
+def parseSizes(s):
+	return [int(size) for size in s.split(',')]
+
+
+def gitRevision():
+	try:
+		result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True)
+		return result.stdout.strip() or None
+	except OSError:
+		return None
+
+
+def createDatabase(db_path):
+	dbh = sqlite3.connect(db_path)
+	with open(SCHEMA_PATH, 'r') as f:
+		dbh.executescript(f.read())
+	dbh.close()
+
+
+def databaseSize(db_path):
+	# include write-ahead log in case it was not checkpointed on close
+	return sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p))
+
+
+def runLoader(db_path, file_path, effective, profile, incremental, metrics_path):
+
+	# each load runs in its own process so that peak memory is measured per load
+	command = [sys.executable, LOADER_PATH, "-e", effective, "-d", db_path, "-p", profile, "-m", metrics_path]
+	if incremental:
+		command.append("-i")
+	command.append(file_path)
+
+	perf_start = time.perf_counter()
+	result = subprocess.run(command, capture_output=True, text=True)
+	wall_seconds = round(time.perf_counter() - perf_start, 4)
+
+	# loader reports failures on stdout, so a missing metrics record means the load did not complete
+	records = []
+	if os.path.exists(metrics_path):
+		with open(metrics_path, 'r') as f:
+			records = [json.loads(line) for line in f if line.strip()]
+	if result.returncode != 0 or not records or records[-1]['effective_date'] != time.strftime("%Y-%m-%d", time.strptime(effective, '%Y%m%d')):
+		print(result.stdout)
+		print(result.stderr)
+		print("FATAL: load of '{}' failed".format(file_path))
+		sys.exit(1)
+
+	return records[-1], wall_seconds
+
+
+def benchmarkSize(args, size, work_dir):
+
+	size_dir = os.path.join(work_dir, "size-{}".format(size))
+	os.makedirs(size_dir, exist_ok=True)
+	db_path = os.path.join(size_dir, "delivery_metrics.db")
+	metrics_path = os.path.join(size_dir, "run_metrics.jsonl")
+	createDatabase(db_path)
+
+	results = []
+	generator = DeliveryDataGenerator(size, churn=args.churn, seed=args.seed)
+	for day in range(args.days):
+
+		# generate snapshot for this day
+		if day > 0:
+			generator.advanceDay()
+		file_path, item_count = generator.writeSnapshot(size_dir, 'jsonl')
+		effective = generator.effectiveDate().strftime('%Y%m%d')
+
+		# load it; the first day is always a full load
+		incremental = args.incremental and day > 0
+		record, wall_seconds = runLoader(db_path, file_path, effective, args.profile, incremental, metrics_path)
+		os.remove(file_path)
+
+		results.append({
+			'label': args.label,
+			'revision': args.revision,
+			'size': size,
+			'day': day,
+			'items': item_count,
+			'mode': 'incremental' if incremental else 'full',
+			'profile': args.profile,
+			'load_seconds': record['elapsed_seconds'],
+			'wall_seconds': wall_seconds,
+			'items_per_second': round(item_count / record['elapsed_seconds'], 1) if record['elapsed_seconds'] > 0 else None,
+			'peak_rss_bytes': record['peak_rss_bytes'],
+			'db_bytes': databaseSize(db_path),
+			'sql_statements': record['sql_statements'],
+			'phases': record['phases']
+		})
+		printResult(results[-1])
+
+	return results
+
+
+def printResult(result):
+
+	peak_rss = result['peak_rss_bytes'] / 1048576 if result['peak_rss_bytes'] is not None else 0
+	print("{:>9} {:>4} {:<12} {:>10.3f} {:>12} {:>10.1f} {:>10.1f}".format(
+		result['items'], result['day'], result['mode'], result['load_seconds'],
+		result['items_per_second'] or '-', peak_rss, result['db_bytes'] / 1048576
+	))
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Benchmark the delivery metrics loader on synthetic exports of increasing size")
+	parser.add_argument("-s", "--sizes", type=parseSizes, default=[10000, 100000, 1000000], help="comma separated list of issue counts (default: 10000,100000,1000000)")
+	parser.add_argument("--days", type=int, default=2, help="number of daily snapshots to load for each size (default: 2)")
+	parser.add_argument("--churn", type=float, default=0.02, help="fraction of issues changed each day (default: 0.02)")
+	parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+	parser.add_argument("-i", "--incremental", action="store_true", help="load snapshots after the first one incrementally")
+	parser.add_argument("-p", "--profile", default="bulk-load", help="sqlite performance profile passed to the loader (default: bulk-load)")
+	parser.add_argument("-l", "--label", help="label to store with the results, e.g. the name of the change being measured")
+	parser.add_argument("-o", "--output", metavar="FILEPATH", default=dirname(abspath(__file__)) + "/results.jsonl", help="json lines file to append results to (default: bench/results.jsonl)")
+	parser.add_argument("-w", "--work-dir", dest="work_dir", metavar="DIRPATH", help="directory for generated files and databases (default: temporary directory, removed afterwards)")
+
+	# get command line args
+	args = parser.parse_args()
+	args.revision = gitRevision()
+
+	work_dir = args.work_dir or tempfile.mkdtemp(prefix="delivery-metrics-bench-")
+	print("...\nbenchmarking loader in {}".format(work_dir))
+	print("{:>9} {:>4} {:<12} {:>10} {:>12} {:>10} {:>10}".format("items", "day", "mode", "seconds", "items/sec", "rss_mb", "db_mb"))
+
+	# run benchmark for each size and append results
+	try:
+		for size in args.sizes:
+			results = benchmarkSize(args, size, work_dir)
+			with open(args.output, 'a') as f:
+				for result in results:
+					f.write(json.dumps(result) + "\n")
+	finally:
+		if args.work_dir is None:
+			shutil.rmtree(work_dir, ignore_errors=True)
+
+	print("results appended to {}".format(args.output))
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
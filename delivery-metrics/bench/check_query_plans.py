@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(dirname(abspath(__file__))) + '/src')
+sys.path.insert(0, dirname(dirname(abspath(__file__))) + '/src/loader')
+
+from argparse import ArgumentParser
+from calculate_percent_complete import DeliveryMetricsBurnUp, DeliveryMetricsPercentComplete
+from calculate_sprint_metrics import DeliveryMetricsSprintMetrics
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_loader import DeliveryMetricsDataLoader
+from delivery_metrics_output_writer import DeliveryMetricsJsonLinesWriter
+from generate_delivery_data import DeliveryDataGenerator
+import contextlib
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+
+SCHEMA_PATH = dirname(dirname(abspath(__file__))) + "/sql/create_delivery_metrics_db.sql"
+
+# tables that grow with the number of issues or days of history
+LARGE_TABLES = [
+	'issue',
+	'issue_history',
+	'issue_sprint_map',
+	'epic',
+	'epic_deliverable_map',
+	'deliverable_quad_map',
+	'issue_history_current',
+	'issue_sprint_map_current',
+	'epic_deliverable_map_current',
+	'deliverable_quad_map_current',
+	'epic_daily_rollup',
+	'deliverable_daily_rollup',
+	'issue_rollup_state',
+	'epic_rollup_state',
+	'snapshot_item_digest',
+	'percent_complete_cache',
+]
+
+# statements that read a whole table on purpose, with the reason
+ALLOWED_SCANS = [
+	(r"^select guid, id, row_hash from ", "dimension cache is preloaded with one scan per table"),
+	(r"^select \w+, max\(d_effective\), row_hash from \w+ group by ", "fact cache is preloaded with one scan per fact table"),
+	(r"^select item_key, item_hash, d_effective from snapshot_item_digest", "snapshot digest is read in full"),
+	(r"^\s*select d_effective, 0, deliverable_id, quad_id, null, null from deliverable_quad_map where d_effective <= ", "burn-up series sweeps all facts once"),
+	(r"^select id, title from deliverable order by id$", "burn-up series reports every deliverable"),
+	(r"^\s*select d_effective, 0, issue_id, sprint_id, null, null from issue_sprint_map where d_effective <= ", "sprint metrics sweep all facts once"),
+]
+
+# statements that must read a table through a covering index, with the reason; the pattern names the table
+REQUIRED_COVERING_INDEXES = [
+	(r"^select \w+, max\(d_effective\), row_hash from (?P<table>\w+) group by ", "fact cache is preloaded from the (entity, d_effective, ..., row_hash) index"),
+	(r"^select\s+h\.issue_id,\s+i\.epic_id,.*\bfrom\s+(?P<table>issue_history)\s", "issues are totalled from the issue history index"),
+	(r"^\s*select\s+h\.issue_id,\s+h\.d_effective,\s+i\.epic_id,.*\bfrom\s+(?P<table>issue_history)\s", "rollups read issue facts from the issue history index"),
+]
+
+
+class DeliveryMetricsPlanCheck:
+
+	def __init__(self, db_path):
+		self.db_path = db_path
+		self.statements = dict()
+
+
+	def capture(self, label, callback=None):
+
+		# trace callback that records each distinct statement, optionally chained to another callback
+		def trace(statement):
+			self.statements.setdefault(self.normalize(statement), (label, statement.strip()))
+			if callback is not None:
+				callback(statement)
+
+		return trace
+
+
+	def run(self, work_dir, issues, days, deliverables=None):
+
+		# one handle discards the output of every load and report
+		with open(os.devnull, 'w') as devnull:
+
+			# load daily snapshots, capturing the statements of the last two loads (full and incremental)
+			generator = DeliveryDataGenerator(issues, deliverables=deliverables)
+			for day in range(days):
+				if day > 0:
+					generator.advanceDay()
+				file_path, item_count = generator.writeSnapshot(work_dir, 'jsonl')
+				config = DeliveryMetricsConfig(time.strptime(generator.effectiveDate().strftime('%Y%m%d'), '%Y%m%d'), 'bulk-load', self.db_path)
+				incremental = (day == days - 1)
+				trace_callback = None
+				if day >= days - 2:
+					trace_callback = self.capture("load incremental" if incremental else "load full")
+				loader = DeliveryMetricsDataLoader(config, file_path, incremental, trace_callback)
+				with contextlib.redirect_stdout(devnull):
+					loader.loadData()
+					loader.db.disconnect()
+				os.remove(file_path)
+				print("loaded {} items for {}".format(item_count, config.effectiveDate()))
+			latest = generator.effectiveDate()
+
+			# run the metrics script for today (current state tables) and for the first day (history)
+			with contextlib.redirect_stdout(devnull):
+				for label, date, verbose in (("metrics current", latest, False), ("metrics history", generator.start, False), ("metrics verbose", generator.start, True)):
+					config = DeliveryMetricsConfig(time.strptime(date.strftime('%Y%m%d'), '%Y%m%d'), 'read-mostly', self.db_path)
+					metrics = DeliveryMetricsPercentComplete(config, verbose, True, DeliveryMetricsJsonLinesWriter(config.effectiveDate(), devnull))
+					metrics.dbh.setTraceCallback(self.capture(label))
+					metrics.calculate()
+					metrics.dbh.disconnect()
+				burn_up = DeliveryMetricsBurnUp(config, time.strptime(generator.start.strftime('%Y%m%d'), '%Y%m%d'), time.strptime(latest.strftime('%Y%m%d'), '%Y%m%d'), DeliveryMetricsJsonLinesWriter(config.effectiveDate(), devnull, DeliveryMetricsBurnUp.FIELDS))
+				burn_up.dbh.setTraceCallback(self.capture("burn-up"))
+				burn_up.calculate()
+				burn_up.dbh.disconnect()
+				sprints = DeliveryMetricsSprintMetrics(config, DeliveryMetricsJsonLinesWriter(config.effectiveDate(), devnull, DeliveryMetricsSprintMetrics.FIELDS))
+				sprints.dbh.setTraceCallback(self.capture("sprint metrics"))
+				sprints.calculate()
+				sprints.dbh.disconnect()
+
+
+	def normalize(self, statement):
+
+		# bound values are expanded into the statement text; keep one statement per shape
+		statement = re.sub(r"'(?:[^']|'')*'", "?", statement.strip())
+		return re.sub(r"\b(\d+(\.\d+)?|NULL)\b", "?", statement)
+
+
+	def check(self, verbose=False):
+
+		dbh = sqlite3.connect(self.db_path)
+		failures = []
+		for label, statement in self.statements.values():
+			if not re.match(r"^(select|insert|update|delete|with)\b", statement, re.IGNORECASE):
+				continue
+			if re.search(r"\b(stage_\w+)\b", statement) and not re.search(r"\bfrom (?!stage_)", statement):
+				continue
+			try:
+				plan = [row[3] for row in dbh.execute("explain query plan " + statement)]
+			except sqlite3.Error as error:
+				print("WARNING: unable to explain statement: {}\n{}".format(error, statement))
+				continue
+			scans = self.largeTableScans(statement, plan)
+			allowed = self.allowedReason(statement)
+			missing = self.missingCoveringIndex(statement, plan)
+			if verbose or (scans and allowed is None) or missing is not None:
+				print("--- [{}] {}".format(label, " ".join(statement.split())[:200]))
+				for detail in plan:
+					print("\t{}".format(detail))
+				if scans and allowed is not None:
+					print("\tallowed: {}".format(allowed))
+				if missing is not None:
+					print("\tmissing covering index: {}".format(missing))
+			if (scans and allowed is None) or missing is not None:
+				failures.append((label, statement, scans, missing))
+		dbh.close()
+
+		return failures
+
+
+	def aliases(self, statement):
+
+		# map aliases to table names, e.g. "issue_history h" or "issue_history as h"
+		aliases = dict((table, table) for table in LARGE_TABLES)
+		for table in LARGE_TABLES:
+			for alias in re.findall(r"\b{}\s+(?:as\s+)?(\w+)".format(table), statement, re.IGNORECASE):
+				if alias.lower() not in ('on', 'where', 'inner', 'left', 'join', 'group', 'order', 'set', 'values', 'select', 'union', 'using', 'as'):
+					aliases[alias] = table
+
+		return aliases
+
+
+	def largeTableScans(self, statement, plan):
+
+		aliases = self.aliases(statement)
+		scans = []
+		for detail in plan:
+			match = re.match(r"^SCAN (\w+)", detail)
+			if match and match.group(1) in aliases:
+				scans.append(detail)
+
+		return scans
+
+
+	def allowedReason(self, statement):
+
+		for pattern, reason in ALLOWED_SCANS:
+			if re.match(pattern, statement):
+				return reason
+
+		return None
+
+
+	def missingCoveringIndex(self, statement, plan):
+
+		# reason a covering index is required, if the statement must use one on a table and its plan does not
+		for pattern, reason in REQUIRED_COVERING_INDEXES:
+			match = re.match(pattern, statement, re.DOTALL)
+			if match is None:
+				continue
+			table = match.group('table')
+			aliases = self.aliases(statement)
+			for detail in plan:
+				found = re.match(r"^(?:SCAN|SEARCH) (\w+) USING COVERING INDEX ", detail)
+				if found and aliases.get(found.group(1), found.group(1)) == table:
+					return None
+			return "{} ({})".format(table, reason)
+
+		return None
+
+
+def createDatabase(work_dir):
+
+	db_path = os.path.join(work_dir, "delivery_metrics.db")
+	dbh = sqlite3.connect(db_path)
+	with open(SCHEMA_PATH, 'r') as f:
+		dbh.executescript(f.read())
+	dbh.close()
+
+	return db_path
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Check query plans of the loader and metrics script for table scans on synthetic data")
+	parser.add_argument("-n", "--issues", type=int, default=100000, help="number of issues (default: 100000)")
+	parser.add_argument("--days", type=int, default=3, help="number of daily snapshots to load (default: 3)")
+	parser.add_argument("-v", "--verbose", action="store_true", help="print the plan of every statement")
+	parser.add_argument("-w", "--work-dir", dest="work_dir", metavar="DIRPATH", help="directory for generated files and database (default: temporary directory, removed afterwards)")
+
+	# get command line args
+	args = parser.parse_args()
+
+	work_dir = args.work_dir or tempfile.mkdtemp(prefix="delivery-metrics-plans-")
+	print("...\nchecking query plans in {}".format(work_dir))
+
+	failures = []
+	try:
+		db_path = createDatabase(work_dir)
+		checker = DeliveryMetricsPlanCheck(db_path)
+
+		checker.run(work_dir, args.issues, args.days)
+
+		# explain every captured statement
+		failures = checker.check(args.verbose)
+		print("checked {} statement(s), {} with unexpected table scans or missing covering indexes".format(len(checker.statements), len(failures)))
+
+	finally:
+		if args.work_dir is None:
+			shutil.rmtree(work_dir, ignore_errors=True)
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
+
+	sys.exit(1 if failures else 0)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from array import array
+import datetime
+import json
+import os
+import random
+import time
+
+# vocabulary for synthetic titles and attributes
+PILLARS = ['SimplerFind', 'SimplerApply', 'SimplerReporting', 'SimplerGrants.gov', None]
+ISSUE_TYPES = ['Task', 'Task', 'Task', 'Bug', 'Enhancement', None]
+ISSUE_POINTS = [1, 2, 3, 5, 8, 13, None]
+STATUSES = ['Todo', 'In Progress', 'In Review', 'Done']
+VERBS = ['Implement', 'Design', 'Refactor', 'Fix', 'Document', 'Test', 'Migrate', 'Deploy']
+NOUNS = ['opportunity listing', 'search results', 'application form', 'login flow', 'api endpoint', 'data export', 'notification', 'report']
+
+QUAD_LENGTH = 91
+SPRINT_LENGTH = 14
+
+
+class DeliveryDataGenerator:
+
+	def __init__(self, issues=10000, quads=4, sprints_per_quad=6, deliverables=None, epics=None, churn=0.02, growth=0.002, start=None, seed=0, repo="example-org/example-repo"):
+
+		self.rng = random.Random(seed)
+		self.churn = churn
+		self.growth = growth
+		self.start = start or datetime.date(2024, 9, 9)
+		self.url_prefix = "https://github.com/{}/issues/".format(repo)
+		self.day = 0
+
+		# issue numbers are shared by deliverables, epics and issues, as on github
+		self._next_number = 1
+
+		self._makeQuads(quads, sprints_per_quad)
+		self._makeDeliverables(deliverables if deliverables is not None else max(1, issues // 500))
+		self._makeEpics(epics if epics is not None else max(1, issues // 50))
+		self._makeIssues(issues)
+
+
+	""" public methods """
+
+
+	def effectiveDate(self) -> datetime.date:
+		return self.start + datetime.timedelta(days=self.day)
+
+
+	def advanceDay(self) -> None:
+
+		# move to next day, then change a fraction of issues and open some new ones
+		self.day += 1
+		rng = self.rng
+		issue_count = len(self.issue_number)
+
+		for _ in range(int(issue_count * self.churn)):
+			i = rng.randrange(issue_count)
+			change = rng.random()
+			if change < 0.7:
+				self._advanceStatus(i)
+			elif change < 0.9:
+				self.issue_points[i] = self._randomPoints()
+			else:
+				self.issue_sprint[i] = self._randomSprint(self.issue_epic[i])
+
+		for _ in range(max(1, int(issue_count * self.growth))):
+			self._addIssue(self.day)
+
+
+	def items(self):
+
+		for i in range(len(self.issue_number)):
+			yield self._item(i)
+
+
+	def writeSnapshot(self, dir_path: str, file_format: str = 'jsonl') -> (str, int):
+
+		# file name carries the effective date so the backfill command can order snapshots
+		file_name = "export-{}.{}".format(self.effectiveDate().strftime('%Y%m%d'), file_format)
+		file_path = os.path.join(dir_path, file_name)
+
+		count = 0
+		with open(file_path, 'w') as f:
+			if file_format == 'json':
+				f.write("[\n")
+			for item in self.items():
+				if file_format == 'json' and count > 0:
+					f.write(",\n")
+				f.write(json.dumps(item))
+				if file_format != 'json':
+					f.write("\n")
+				count += 1
+			if file_format == 'json':
+				f.write("\n]\n")
+
+		return file_path, count
+
+
+	""" private methods """
+
+
+	def _makeQuads(self, quad_count: int, sprints_per_quad: int) -> None:
+
+		self.quads = []
+		self.sprints = []
+		for q in range(quad_count):
+			quad_start = self.start + datetime.timedelta(days=q * QUAD_LENGTH)
+			self.quads.append({
+				'quad_id': self._randomGuid(),
+				'quad_name': "BY{} Quad {}".format(quad_start.year, q % 4 + 1),
+				'quad_start': quad_start.isoformat(),
+				'quad_length': QUAD_LENGTH,
+				'quad_end': (quad_start + datetime.timedelta(days=QUAD_LENGTH)).isoformat()
+			})
+
+			# sprints follow each other within their quad
+			for s in range(sprints_per_quad):
+				sprint_start = quad_start + datetime.timedelta(days=s * SPRINT_LENGTH)
+				self.sprints.append({
+					'sprint_id': self._randomGuid(),
+					'sprint_name': "Sprint {}".format(len(self.sprints) + 1),
+					'sprint_start': sprint_start.isoformat(),
+					'sprint_length': SPRINT_LENGTH,
+					'sprint_end': (sprint_start + datetime.timedelta(days=SPRINT_LENGTH)).isoformat(),
+					'quad': q
+				})
+
+		self.sprints_by_quad = {}
+		for s, sprint in enumerate(self.sprints):
+			self.sprints_by_quad.setdefault(sprint['quad'], []).append(s)
+
+
+	def _makeDeliverables(self, count: int) -> None:
+
+		self.deliverables = []
+		for d in range(count):
+			self.deliverables.append({
+				'deliverable_url': self.url_prefix + str(self._nextNumber()),
+				'deliverable_title': "Deliverable {}".format(d + 1),
+				'deliverable_pillar': self.rng.choice(PILLARS),
+				'quad': self.rng.randrange(len(self.quads))
+			})
+
+
+	def _makeEpics(self, count: int) -> None:
+
+		# about one epic in ten is not attached to a deliverable
+		self.epics = []
+		for e in range(count):
+			deliverable = self.rng.randrange(len(self.deliverables)) if self.rng.random() > 0.1 else None
+			self.epics.append({
+				'epic_url': self.url_prefix + str(self._nextNumber()),
+				'epic_title': "{} {}".format(self.rng.choice(VERBS), self.rng.choice(NOUNS)),
+				'deliverable': deliverable
+			})
+
+
+	def _makeIssues(self, count: int) -> None:
+
+		# issue state is kept in compact parallel arrays so that large exports fit in memory
+		self.issue_number = array('l')
+		self.issue_epic = array('l')
+		self.issue_sprint = array('l')
+		self.issue_type = array('b')
+		self.issue_points = array('b')
+		self.issue_status = array('b')
+		self.issue_opened = array('l')
+		self.issue_closed = array('l')
+
+		# existing issues were opened during the last two months and are somewhere along the workflow
+		for _ in range(count):
+			self._addIssue(-self.rng.randrange(60))
+			for _ in range(self.rng.randrange(len(STATUSES))):
+				self._advanceStatus(len(self.issue_number) - 1)
+
+
+	def _addIssue(self, opened_day: int) -> None:
+
+		rng = self.rng
+		epic = rng.randrange(len(self.epics)) if rng.random() > 0.05 else -1
+		self.issue_number.append(self._nextNumber())
+		self.issue_epic.append(epic)
+		self.issue_sprint.append(self._randomSprint(epic))
+		self.issue_type.append(rng.randrange(len(ISSUE_TYPES)))
+		self.issue_points.append(self._randomPoints())
+		self.issue_status.append(0)
+		self.issue_opened.append(opened_day)
+		self.issue_closed.append(-1 << 30)
+
+
+	def _advanceStatus(self, i: int) -> None:
+
+		if self.issue_status[i] < len(STATUSES) - 1:
+			self.issue_status[i] += 1
+			if self.issue_status[i] == len(STATUSES) - 1:
+				self.issue_closed[i] = max(self.day, self.issue_opened[i])
+
+
+	def _randomSprint(self, epic: int) -> int:
+
+		# issues of a deliverable are scheduled in sprints of the deliverable's quad; some are unscheduled
+		if self.rng.random() < 0.1:
+			return -1
+		deliverable = self.epics[epic]['deliverable'] if epic >= 0 else None
+		if deliverable is None:
+			return self.rng.randrange(len(self.sprints))
+		return self.rng.choice(self.sprints_by_quad[self.deliverables[deliverable]['quad']])
+
+
+	def _randomPoints(self) -> int:
+
+		points = self.rng.choice(ISSUE_POINTS)
+		return -1 if points is None else points
+
+
+	def _randomGuid(self) -> str:
+		return "{:08x}".format(self.rng.getrandbits(32))
+
+
+	def _nextNumber(self) -> int:
+		number = self._next_number
+		self._next_number += 1
+		return number
+
+
+	def _timestamp(self, day: int, number: int) -> str:
+		t = datetime.datetime.combine(self.start, datetime.time(9)) + datetime.timedelta(days=day, seconds=number % 28800)
+		return t.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+	def _item(self, i: int) -> dict:
+
+		number = self.issue_number[i]
+		epic = self.epics[self.issue_epic[i]] if self.issue_epic[i] >= 0 else None
+		deliverable = self.deliverables[epic['deliverable']] if epic is not None and epic['deliverable'] is not None else None
+		sprint = self.sprints[self.issue_sprint[i]] if self.issue_sprint[i] >= 0 else None
+
+		# quad is the deliverable's quad, which is also the quad of the sprints its issues are scheduled in
+		if deliverable is not None:
+			quad = self.quads[deliverable['quad']]
+		elif sprint is not None:
+			quad = self.quads[sprint['quad']]
+		else:
+			quad = None
+
+		points = self.issue_points[i]
+		is_closed = self.issue_status[i] == len(STATUSES) - 1
+		verb = VERBS[number % len(VERBS)]
+		noun = NOUNS[(number // len(VERBS)) % len(NOUNS)]
+
+		return {
+			'issue_title': "{} {} ({})".format(verb, noun, number),
+			'issue_url': self.url_prefix + str(number),
+			'issue_parent': epic['epic_url'] if epic is not None else None,
+			'issue_type': ISSUE_TYPES[self.issue_type[i]],
+			'issue_is_closed': is_closed,
+			'issue_opened_at': self._timestamp(self.issue_opened[i], number),
+			'issue_closed_at': self._timestamp(self.issue_closed[i], number) if is_closed else None,
+			'issue_points': points if points >= 0 else None,
+			'issue_status': STATUSES[self.issue_status[i]],
+			'sprint_id': sprint['sprint_id'] if sprint is not None else None,
+			'sprint_name': sprint['sprint_name'] if sprint is not None else None,
+			'sprint_start': sprint['sprint_start'] if sprint is not None else None,
+			'sprint_length': sprint['sprint_length'] if sprint is not None else None,
+			'sprint_end': sprint['sprint_end'] if sprint is not None else None,
+			'quad_id': quad['quad_id'] if quad is not None else None,
+			'quad_name': quad['quad_name'] if quad is not None else None,
+			'quad_start': quad['quad_start'] if quad is not None else None,
+			'quad_length': quad['quad_length'] if quad is not None else None,
+			'quad_end': quad['quad_end'] if quad is not None else None,
+			'deliverable_pillar': deliverable['deliverable_pillar'] if deliverable is not None else None,
+			'deliverable_url': deliverable['deliverable_url'] if deliverable is not None else None,
+			'deliverable_title': deliverable['deliverable_title'] if deliverable is not None else None,
+			'epic_url': epic['epic_url'] if epic is not None else None,
+			'epic_title': epic['epic_title'] if epic is not None else None
+		}
+
+
+def parseDateArg(d):
+	return datetime.datetime.strptime(d, '%Y%m%d').date()
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Generate synthetic daily exports in the delivery metrics loader's input format")
+	parser.add_argument("dir", metavar="DIRPATH", help="directory to write snapshot files to")
+	parser.add_argument("-n", "--issues", type=int, default=10000, help="number of issues in the first snapshot (default: 10000)")
+	parser.add_argument("--quads", type=int, default=4, help="number of quads (default: 4)")
+	parser.add_argument("--sprints-per-quad", dest="sprints_per_quad", type=int, default=6, help="number of sprints in each quad (default: 6)")
+	parser.add_argument("--deliverables", type=int, help="number of deliverables (default: one per 500 issues)")
+	parser.add_argument("--epics", type=int, help="number of epics (default: one per 50 issues)")
+	parser.add_argument("--days", type=int, default=1, help="number of daily snapshots to write (default: 1)")
+	parser.add_argument("--churn", type=float, default=0.02, help="fraction of issues changed each day (default: 0.02)")
+	parser.add_argument("--growth", type=float, default=0.002, help="fraction of issues opened each day (default: 0.002)")
+	parser.add_argument("--start", type=parseDateArg, help="effective date of first snapshot, YYYYMMDD (default: 20240909)")
+	parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+	parser.add_argument("-f", "--format", default="jsonl", choices=['json', 'jsonl'], help="output format (default: jsonl)")
+
+	# get command line args
+	args = parser.parse_args()
+	os.makedirs(args.dir, exist_ok=True)
+
+	# write one snapshot per day
+	generator = DeliveryDataGenerator(args.issues, args.quads, args.sprints_per_quad, args.deliverables, args.epics, args.churn, args.growth, args.start, args.seed)
+	for day in range(args.days):
+		if day > 0:
+			generator.advanceDay()
+		file_path, count = generator.writeSnapshot(args.dir, args.format)
+		print("wrote {} items to {}".format(count, file_path))
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
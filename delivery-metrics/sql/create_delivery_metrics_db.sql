@@ -1,4 +1,4 @@
-# drop tables
+-- drop tables
 
 DROP TABLE IF EXISTS deliverable;
 DROP TABLE IF EXISTS deliverable_quad_map;
@@ -9,19 +9,42 @@ DROP TABLE IF EXISTS issue_history;
 DROP TABLE IF EXISTS issue_sprint_map;
 DROP TABLE IF EXISTS sprint;
 DROP TABLE IF EXISTS quad;
+DROP TABLE IF EXISTS snapshot_item_digest;
+DROP TABLE IF EXISTS deliverable_quad_map_current;
+DROP TABLE IF EXISTS epic_deliverable_map_current;
+DROP TABLE IF EXISTS issue_history_current;
+DROP TABLE IF EXISTS issue_sprint_map_current;
+DROP TABLE IF EXISTS data_version;
+DROP TABLE IF EXISTS percent_complete_cache;
+DROP TABLE IF EXISTS percent_complete_cache_date;
+DROP TABLE IF EXISTS epic_daily_rollup;
+DROP TABLE IF EXISTS deliverable_daily_rollup;
+DROP TABLE IF EXISTS issue_rollup_state;
+DROP TABLE IF EXISTS epic_rollup_state;
 DROP INDEX IF EXISTS dqm_i1;
+DROP INDEX IF EXISTS dqm_i2;
 DROP INDEX IF EXISTS edm_i1;
+DROP INDEX IF EXISTS edm_i2;
 DROP INDEX IF EXISTS issue_i1;
 DROP INDEX IF EXISTS ih_i1;
+DROP INDEX IF EXISTS ism_i1;
+DROP INDEX IF EXISTS ism_i2;
 DROP INDEX IF EXISTS quad_i1;
+DROP INDEX IF EXISTS dqmc_i1;
+DROP INDEX IF EXISTS dqmc_i2;
+DROP INDEX IF EXISTS edmc_i1;
+DROP INDEX IF EXISTS edmc_i2;
+DROP INDEX IF EXISTS ihc_i1;
+DROP INDEX IF EXISTS ismc_i1;
 
-# create tables
+-- create tables
 
 CREATE TABLE deliverable (
 	id INTEGER PRIMARY KEY AUTOINCREMENT,
 	guid TEXT UNIQUE NOT NULL,
 	title TEXT NOT NULL,
 	pillar TEXT, 
+	row_hash TEXT,
 	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 	t_modified TIMESTAMP 
 );
@@ -31,15 +54,18 @@ CREATE TABLE deliverable_quad_map (
 	deliverable_id INTEGER NOT NULL,
 	quad_id INTEGER,
 	d_effective DATE NOT NULL,
+	row_hash TEXT,
 	t_modified TIMESTAMP,
 	UNIQUE(deliverable_id, d_effective)
 );
-CREATE INDEX dqm_i1 on deliverable_quad_map(quad_id, d_effective);
+CREATE INDEX dqm_i1 on deliverable_quad_map(quad_id, deliverable_id);
+CREATE INDEX dqm_i2 on deliverable_quad_map(deliverable_id, d_effective, quad_id, row_hash);
 
 CREATE TABLE epic (
 	id INTEGER PRIMARY KEY AUTOINCREMENT,
 	guid TEXT UNIQUE NOT NULL,
 	title TEXT NOT NULL,
+	row_hash TEXT,
 	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 	t_modified TIMESTAMP 
 );
@@ -49,10 +75,12 @@ CREATE TABLE epic_deliverable_map (
 	epic_id INTEGER NOT NULL,
 	deliverable_id INTEGER,
 	d_effective DATE NOT NULL,
+	row_hash TEXT,
 	t_modified TIMESTAMP,
 	UNIQUE(epic_id, d_effective)
 );
-CREATE INDEX edm_i1 on epic_deliverable_map(deliverable_id, d_effective);
+CREATE INDEX edm_i1 on epic_deliverable_map(deliverable_id, epic_id);
+CREATE INDEX edm_i2 on epic_deliverable_map(epic_id, d_effective, deliverable_id, row_hash);
 
 CREATE TABLE issue (
 	id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -63,6 +91,7 @@ CREATE TABLE issue (
 	closed_date DATE,
 	parent_issue_guid TEXT,
 	epic_id INTEGER,
+	row_hash TEXT,
 	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 	t_modified TIMESTAMP 
 );
@@ -75,19 +104,23 @@ CREATE TABLE issue_history (
 	is_closed INTEGER NOT NULL,
 	points INTEGER NOT NULL DEFAULT 0,
 	d_effective DATE NOT NULL,
+	row_hash TEXT,
 	t_modified TIMESTAMP,
 	UNIQUE(issue_id, d_effective)
 );
-CREATE INDEX ih_i1 on issue_history(issue_id, d_effective);
+CREATE INDEX ih_i1 on issue_history(issue_id, d_effective, points, is_closed, row_hash);
 
 CREATE TABLE issue_sprint_map (
 	id INTEGER PRIMARY KEY AUTOINCREMENT,
 	issue_id INTEGER NOT NULL,
 	sprint_id INTEGER,
 	d_effective DATE NOT NULL,
+	row_hash TEXT,
 	t_modified TIMESTAMP,
 	UNIQUE(issue_id, d_effective)
 );
+CREATE INDEX ism_i1 on issue_sprint_map(sprint_id, d_effective);
+CREATE INDEX ism_i2 on issue_sprint_map(issue_id, d_effective, sprint_id, row_hash);
 
 CREATE TABLE sprint (
 	id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -97,6 +130,7 @@ CREATE TABLE sprint (
 	end_date DATE,
 	duration INTEGER,
 	quad_id INTEGER,
+	row_hash TEXT,
 	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 	t_modified TIMESTAMP 
 );
@@ -108,8 +142,128 @@ CREATE TABLE quad (
 	start_date DATE,
 	end_date DATE,
 	duration INTEGER,
+	row_hash TEXT,
 	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 	t_modified TIMESTAMP 
 );
 CREATE INDEX quad_i1 on quad(start_date);
- 
+
+CREATE TABLE snapshot_item_digest (
+	item_key TEXT PRIMARY KEY,
+	item_hash TEXT NOT NULL,
+	d_effective DATE NOT NULL
+);
+
+-- current state tables: latest row of each fact table per entity, maintained by the loader
+
+CREATE TABLE deliverable_quad_map_current (
+	deliverable_id INTEGER PRIMARY KEY,
+	quad_id INTEGER,
+	d_effective DATE NOT NULL,
+	row_hash TEXT,
+	t_modified TIMESTAMP
+);
+CREATE INDEX dqmc_i1 on deliverable_quad_map_current(quad_id);
+CREATE INDEX dqmc_i2 on deliverable_quad_map_current(d_effective);
+
+CREATE TABLE epic_deliverable_map_current (
+	epic_id INTEGER PRIMARY KEY,
+	deliverable_id INTEGER,
+	d_effective DATE NOT NULL,
+	row_hash TEXT,
+	t_modified TIMESTAMP
+);
+CREATE INDEX edmc_i1 on epic_deliverable_map_current(deliverable_id);
+CREATE INDEX edmc_i2 on epic_deliverable_map_current(d_effective);
+
+CREATE TABLE issue_history_current (
+	issue_id INTEGER PRIMARY KEY,
+	status TEXT,
+	is_closed INTEGER NOT NULL,
+	points INTEGER NOT NULL DEFAULT 0,
+	d_effective DATE NOT NULL,
+	row_hash TEXT,
+	t_modified TIMESTAMP
+);
+CREATE INDEX ihc_i1 on issue_history_current(d_effective);
+
+CREATE TABLE issue_sprint_map_current (
+	issue_id INTEGER PRIMARY KEY,
+	sprint_id INTEGER,
+	d_effective DATE NOT NULL,
+	row_hash TEXT,
+	t_modified TIMESTAMP
+);
+CREATE INDEX ismc_i1 on issue_sprint_map_current(d_effective);
+
+-- data version: incremented by the loader on every committed load
+
+CREATE TABLE data_version (
+	id INTEGER PRIMARY KEY CHECK (id = 1),
+	version INTEGER NOT NULL,
+	t_modified TIMESTAMP
+);
+INSERT INTO data_version (id, version) VALUES (1, 0);
+
+-- result cache: percent complete totals per quad, deliverable and effective date, valid for one data version
+
+CREATE TABLE percent_complete_cache (
+	quad_id INTEGER NOT NULL,
+	deliverable_id INTEGER NOT NULL,
+	d_effective DATE NOT NULL,
+	data_version INTEGER NOT NULL,
+	deliverable_effective DATE,
+	issues INTEGER NOT NULL,
+	issues_closed INTEGER NOT NULL,
+	points INTEGER NOT NULL,
+	points_closed INTEGER NOT NULL,
+	PRIMARY KEY (d_effective, quad_id, deliverable_id)
+);
+
+CREATE TABLE percent_complete_cache_date (
+	d_effective DATE PRIMARY KEY,
+	data_version INTEGER NOT NULL,
+	t_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- daily rollups: issue and point totals per epic and deliverable, one row per date on which they changed, maintained by the loader
+
+CREATE TABLE epic_daily_rollup (
+	epic_id INTEGER NOT NULL,
+	d_effective DATE NOT NULL,
+	issues INTEGER NOT NULL DEFAULT 0,
+	issues_closed INTEGER NOT NULL DEFAULT 0,
+	points INTEGER NOT NULL DEFAULT 0,
+	points_closed INTEGER NOT NULL DEFAULT 0,
+	t_modified TIMESTAMP,
+	PRIMARY KEY (epic_id, d_effective)
+);
+
+CREATE TABLE deliverable_daily_rollup (
+	deliverable_id INTEGER NOT NULL,
+	d_effective DATE NOT NULL,
+	issues INTEGER NOT NULL DEFAULT 0,
+	issues_closed INTEGER NOT NULL DEFAULT 0,
+	points INTEGER NOT NULL DEFAULT 0,
+	points_closed INTEGER NOT NULL DEFAULT 0,
+	t_modified TIMESTAMP,
+	PRIMARY KEY (deliverable_id, d_effective)
+);
+
+-- facts last applied to the daily rollups: each issue's epic, points and closed state, and each epic's deliverable, by effective date
+
+CREATE TABLE issue_rollup_state (
+	issue_id INTEGER NOT NULL,
+	d_effective DATE NOT NULL,
+	epic_id INTEGER,
+	points INTEGER NOT NULL DEFAULT 0,
+	is_closed INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (issue_id, d_effective)
+);
+
+CREATE TABLE epic_rollup_state (
+	epic_id INTEGER NOT NULL,
+	d_effective DATE NOT NULL,
+	deliverable_id INTEGER,
+	PRIMARY KEY (epic_id, d_effective)
+);
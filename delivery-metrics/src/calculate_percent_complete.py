@@ -5,19 +5,41 @@ import sys
 sys.path.insert(0, dirname(abspath(__file__)) + '/loader')
 
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from delivery_metrics_columnar_history import DeliveryMetricsColumnarHistory
 from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_connection_pool import DeliveryMetricsConnectionPool
 from delivery_metrics_database import DeliveryMetricsDatabase
+from delivery_metrics_output_writer import DeliveryMetricsTextWriter, OUTPUT_WRITERS
+from delivery_metrics_schema import DeliveryMetricsSchema
+import datetime
 import functools 
+import itertools
+import json
+import contextlib
+import sqlite3
+import sys
 import time
 
 
 class DeliveryMetricsPercentComplete:
 
-	def __init__(self, config, verbose=False):
+	def __init__(self, config, verbose=False, use_cache=True, writer=None, jobs=1, columnar=False):
 		self.config = config
 		self.dbh = DeliveryMetricsDatabase(config)
 		self.max_effective_date = config.effectiveDate()
 		self.verbose = verbose
+		self.use_cache = use_cache
+		self.jobs = max(1, jobs)
+
+		# worker threads resolve the issues of each deliverable, which only verbose mode reads
+		if self.jobs > 1 and not verbose:
+			print("WARNING: worker threads are only used in verbose mode; ignoring jobs={}".format(self.jobs))
+			self.jobs = 1
+		self.columnar = columnar
+		self.columnar_history = None
+		self.writer = writer if writer is not None else DeliveryMetricsTextWriter(self.max_effective_date)
+		self.use_current_state = False
 		self._found_some = False
 
 
@@ -26,38 +48,108 @@ class DeliveryMetricsPercentComplete:
 		# initialize cursor
 		cursor = self.dbh.cursor()
 
-		# iterate quads
+		# read data version and results from one consistent snapshot of the db; -j workers check they see the same data version
+		with self.dbh.transaction():
+
+			# answer from result cache if it was filled at the current data version
+			data_version = self.getDataVersion(cursor)
+			cached_results = None
+			if self.use_cache and not self.verbose:
+				cached_results = self.getCachedResults(cursor, data_version)
+
+			if cached_results is not None:
+				print("reading results from cache (data version {})".format(data_version))
+				self.printResults(self.getQuads(cursor), cached_results)
+			else:
+				results = self.calculateResults(cursor)
+
+		# cache results of this calculation
+		if self.use_cache and cached_results is None:
+			self.saveCachedResults(cursor, data_version, results)
+
+		# close cursor and finish output
+		cursor.close()
+		self.writer.close()
+
+		# output if no results found
+		if self._found_some is False:
+			print("no results found")
+
+
+	def calculateResults(self, cursor):
+
+		# init data store: quad id -> list of (deliverable id, title, effective, totals)
+		results = dict()
+
+		# read current state tables directly unless the effective date is in the past
+		self.use_current_state = self.isCurrentStateEffective(cursor)
+		print("resolving state from {} tables".format("current state" if self.use_current_state else "history"))
+
+		# resolve latest state as of effective date with one query per entity,
+		# each scoped to the ids found by the previous one
 		quads = self.getQuads(cursor)
+		deliverables_by_quad = self.getDeliverables(cursor, quads.keys())
+		deliverable_ids = [d_id for q_id in quads for d_id in deliverables_by_quad.get(q_id, {})]
+
+		# without verbose output, deliverable totals are read from the daily rollups maintained by the loader,
+		# or calculated from issue history loaded into memory
+		deliverable_totals = None
+		if self.columnar and not self.verbose:
+			deliverable_totals = self.getColumnarTotals()
+		elif not self.verbose:
+			deliverable_totals = self.getDeliverableRollups(cursor, deliverable_ids)
+			if deliverable_totals is not None:
+				print("reading deliverable totals from daily rollups")
+		if deliverable_totals is not None:
+			epics_by_deliverable = dict()
+			issues_by_deliverable = itertools.repeat(dict())
+
+		# otherwise total the issues of each deliverable, in output order
+		else:
+			epics_by_deliverable = self.getEpics(cursor, deliverable_ids)
+			issues_by_deliverable = self.getIssuesByDeliverable(cursor, deliverable_ids, epics_by_deliverable)
+
+		# iterate quads
 		for quad_id, quad_name in quads.items():
 
 			# output
-			print("[QUAD] {}".format(quad_name))
+			self.writer.startQuad(quad_id, quad_name)
+			results[quad_id] = []
 
 			# iterate deliverables
-			deliverables = self.getDeliverables(cursor, quad_id)
+			deliverables = deliverables_by_quad.get(quad_id, {})
 			for deliverable_id, d in deliverables.items():
 
 				# output
-				print("\t[DELIVERABLE] {} (effective {})".format(d.get('title'), d.get('effective')))
+				self.writer.startDeliverable(deliverable_id, d.get('title'), d.get('effective'))
 
 				# initialize counters
 				total = DeliveryMetricsPercentCompleteTotals()
+				issues_by_epic = next(issues_by_deliverable)
+
+				# precomputed totals
+				if deliverable_totals is not None:
+					total = deliverable_totals.get(deliverable_id, total)
+					if total.issues > 0:
+						self._found_some = True
 			
 				# iterate epics
-				epics = self.getEpics(cursor, deliverable_id)
+				epics = epics_by_deliverable.get(deliverable_id, {})
 				for epic_id, e in epics.items():
 				
 					# output
 					if self.verbose:
-						print("\t\t[EPIC] {} (effective {})".format(e.get('title'), e.get('effective') )) 
+						self.writer.startEpic(epic_id, e.get('title'), e.get('effective'))
+						epic_total = DeliveryMetricsPercentCompleteTotals()
 				
 					# iterate issues
-					issues = self.getIssues(cursor, epic_id)
+					issues = issues_by_epic.get(epic_id, {})
 					for issue_id, i in issues.items():
 					
 						# output
 						if self.verbose:
-							print("\t\t\t[ISSUE] {} (effective {}, points={}, closed={})".format(i.get('title'), i.get('effective'), i.get('points'), i.get('closed')))
+							self.writer.writeIssue(issue_id, i.get('title'), i.get('effective'), i.get('points'), i.get('closed'))
+							epic_total.addIssue(i.get('points', 0), i.get('closed', False))
 
 						# increment counters
 						self._found_some = True
@@ -69,21 +161,109 @@ class DeliveryMetricsPercentComplete:
 
 					# end issue iteration loop
 
+					# output epic totals
+					if self.verbose:
+						self.writer.endEpic(epic_id, e.get('title'), e.get('effective'), epic_total)
+
 				# end epic iteration loop
 
-				# calculate and output results
-				total.printResults()
+				# output results
+				self.writer.endDeliverable(deliverable_id, total)
+				results[quad_id].append((deliverable_id, d.get('title'), d.get('effective'), total))
 
 			# end deliverable iteration loop
 			
 		# end quad iteration loop
 
-		# close cursor
-		cursor.close()
+		return results
 
-		# output if no results found
-		if self._found_some is False:
-			print("no results found")
+
+	def printResults(self, quads, results):
+
+		# same output as calculateResults, from precomputed totals
+		for quad_id, quad_name in quads.items():
+			self.writer.startQuad(quad_id, quad_name)
+			for deliverable_id, title, effective, total in results.get(quad_id, []):
+				self.writer.startDeliverable(deliverable_id, title, effective)
+				self.writer.endDeliverable(deliverable_id, total)
+				if total.issues > 0:
+					self._found_some = True
+
+
+	def getDataVersion(self, cursor):
+
+		# incremented by the loader on every committed load
+		row = cursor.execute("select version from data_version where id = 1").fetchone()
+
+		return row[0] if row is not None else None
+
+
+	def getCachedResults(self, cursor, data_version):
+
+		# cached results are only valid for the data version they were computed from
+		sql = "select data_version from percent_complete_cache_date where d_effective = ?"
+		row = cursor.execute(sql, (self.max_effective_date,)).fetchone()
+		if data_version is None or row is None or row[0] != data_version:
+			return None
+
+		# init data store: quad id -> list of (deliverable id, title, effective, totals)
+		results = dict()
+
+		# define sql
+		sql = '''
+			select
+				c.quad_id,
+				c.deliverable_id,
+				d.title,
+				c.deliverable_effective,
+				c.issues,
+				c.issues_closed,
+				c.points,
+				c.points_closed
+			from
+				percent_complete_cache c
+			inner join deliverable d on d.id = c.deliverable_id
+			where
+				c.d_effective = ?
+			order by c.quad_id, c.deliverable_id
+		'''
+
+		# get cached totals
+		cursor.execute(sql, (self.max_effective_date,))
+		for row in cursor:
+			total = DeliveryMetricsPercentCompleteTotals()
+			total.issues, total.issues_closed, total.points, total.points_closed = row[4:8]
+			results.setdefault(row[0], []).append((row[1], row[2], row[3], total))
+
+		return results
+
+
+	def saveCachedResults(self, cursor, data_version, results):
+
+		if data_version is None:
+			return
+
+		rows = []
+		for quad_id, deliverables in results.items():
+			for deliverable_id, title, effective, total in deliverables:
+				rows.append((quad_id, deliverable_id, self.max_effective_date, data_version, effective, total.issues, total.issues_closed, total.points, total.points_closed))
+
+		try:
+			with self.dbh.transaction():
+
+				# do not tag results with a newer data version if a load was committed in the meantime
+				if self.getDataVersion(cursor) != data_version:
+					return
+
+				# replace results for this effective date
+				cursor.execute("delete from percent_complete_cache where d_effective = ?", (self.max_effective_date,))
+				insert_sql = "insert into percent_complete_cache (quad_id, deliverable_id, d_effective, data_version, deliverable_effective, issues, issues_closed, points, points_closed) values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+				cursor.executemany(insert_sql, rows)
+				upsert_sql = "insert into percent_complete_cache_date (d_effective, data_version) values (?, ?) on conflict(d_effective) do update set (data_version, t_created) = (excluded.data_version, current_timestamp)"
+				cursor.execute(upsert_sql, (self.max_effective_date, data_version))
+
+		except sqlite3.Error as error:
+			print("WARNING: unable to cache results: {}".format(error))
 
 
 	def getQuads(self, cursor):
@@ -100,6 +280,7 @@ class DeliveryMetricsPercentComplete:
 				quad
 			where
 				start_date <= ?
+			order by id
 		'''
 
 		# get quads
@@ -112,109 +293,373 @@ class DeliveryMetricsPercentComplete:
 		return quads
 
 
-	def getDeliverables(self, cursor, quad_id):
+	def getDeliverables(self, cursor, quad_ids):
 
-		# init data store
+		# init data store: quad id -> deliverable id -> deliverable
 		deliverables = dict()
 
-		# define sql
+		# define sql: latest quad mapping of each deliverable ever mapped to one of the given quads, kept only if that quad is still one of them
+		deliverable_filter = "deliverable_id in (select deliverable_id from deliverable_quad_map where quad_id in (select value from json_each(:ids)))"
 		sql = ''' 
 			select 
-				deliverable_id,
-				max(d_effective),
+				m.deliverable_id,
+				m.quad_id,
+				m.d_effective,
 				d.title 
-			from 
-				deliverable_quad_map m 
+			from {latest} m
 			inner join deliverable d on d.id = m.deliverable_id
 			where
-				quad_id = ? and
-				d_effective <= ?
-			group by deliverable_id
-		'''
+				m.quad_id in (select value from json_each(:ids))
+			order by m.deliverable_id
+		'''.format(latest=self.latestFacts('deliverable_quad_map', 'deliverable_id', 'quad_id', deliverable_filter))
 
 		# get deliverables
-		cursor.execute(sql, (quad_id, self.max_effective_date))
-		all_rows = cursor.fetchall()
-		for row in all_rows: 
+		cursor.execute(sql, {'effective': self.max_effective_date, 'ids': json.dumps(list(quad_ids))})
+		for row in cursor:
 			d_id = row[0]
-			deliverables[d_id] = {
-				'effective': row[1],
-				'title': row[2]
+			deliverables.setdefault(row[1], dict())[d_id] = {
+				'effective': row[2],
+				'title': row[3]
 			}
 
 		return deliverables
 	
 
-	def getEpics(self, cursor, deliverable_id):
+	def getEpics(self, cursor, deliverable_ids):
 
-		# init data store
+		# init data store: deliverable id -> epic id -> epic
 		epics = dict()
 
-		# define sql
+		# define sql: latest deliverable mapping of each epic ever mapped to one of the given deliverables, kept only if that deliverable is still one of them
+		epic_filter = "epic_id in (select epic_id from epic_deliverable_map where deliverable_id in (select value from json_each(:ids)))"
 		sql = '''
 			select 
-				epic_id,
-				max(d_effective),
+				m.epic_id,
+				m.deliverable_id,
+				m.d_effective,
 				e.title 
-			from 
-				epic_deliverable_map m
+			from {latest} m
 			inner join epic e on e.id = m.epic_id 
 			where 
-				deliverable_id = ? and
-				d_effective <= ?
-			group by epic_id
-		'''
+				m.deliverable_id in (select value from json_each(:ids))
+			order by m.epic_id
+		'''.format(latest=self.latestFacts('epic_deliverable_map', 'epic_id', 'deliverable_id', epic_filter))
 
 		# get epics
-		cursor.execute(sql, (deliverable_id, self.max_effective_date))
-		all_rows = cursor.fetchall()
-		for row in all_rows: 
+		cursor.execute(sql, {'effective': self.max_effective_date, 'ids': json.dumps(list(deliverable_ids))})
+		for row in cursor:
 			e_id = row[0]
-			epics[e_id] = {
-				'effective': row[1],
-				'title': row[2]
+			epics.setdefault(row[1], dict())[e_id] = {
+				'effective': row[2],
+				'title': row[3]
 			}
 
 		return epics
 
 
-	def getIssues(self, cursor, epic_id):
+	def getIssues(self, cursor, epic_ids):
 
-		# init data store
+		# init data store: epic id -> issue id -> issue
 		issues = dict()
 
-		# define sql
+		# define sql: latest history row of each issue in the given epics
+		issue_filter = "issue_id in (select id from issue where epic_id in (select value from json_each(:ids)))"
 		sql = '''
 			select 
-				issue_id,
-				max(d_effective),
-				points,
-				is_closed,
+				h.issue_id,
+				i.epic_id,
+				h.d_effective,
+				h.points,
+				h.is_closed,
 				i.title
-			from 
-				issue_history h 
+			from {latest} h
 			inner join issue i on i.id = h.issue_id 
-			where 
-				epic_id = ? and
-				d_effective <= ?
-			group by issue_id
-		'''
+			order by h.issue_id
+		'''.format(latest=self.latestFacts('issue_history', 'issue_id', 'points, is_closed', issue_filter))
 
 		# get issues
-		cursor.execute(sql, (epic_id, self.max_effective_date))
-		all_rows = cursor.fetchall()
-		for row in all_rows:
+		cursor.execute(sql, {'effective': self.max_effective_date, 'ids': json.dumps(list(epic_ids))})
+		for row in cursor:
 			i_id = row[0]
-			issues[i_id] = {
-				'effective': row[1],
-				'points': row[2],
-				'closed': bool(row[3]),
-				'title': row[4]
+			issues.setdefault(row[1], dict())[i_id] = {
+				'effective': row[2],
+				'points': row[3],
+				'closed': bool(row[4]),
+				'title': row[5]
 			}
 		
 		return issues
 
 
+	def getDeliverableRollups(self, cursor, deliverable_ids):
+
+		# init data store: deliverable id -> totals
+		rollups = dict()
+
+		# define sql: latest rollup row of each deliverable as of effective date
+		sql = '''
+			select
+				r.deliverable_id,
+				r.issues,
+				r.issues_closed,
+				r.points,
+				r.points_closed
+			from
+				deliverable_daily_rollup r
+			where
+				r.deliverable_id in (select value from json_each(:ids)) and
+				r.d_effective = (
+					select max(d_effective) from deliverable_daily_rollup
+					where deliverable_id = r.deliverable_id and d_effective <= :effective
+				)
+		'''
+
+		# get rollups; databases created without rollup tables fall back to totalling issues
+		try:
+			cursor.execute(sql, {'effective': self.max_effective_date, 'ids': json.dumps(list(deliverable_ids))})
+		except sqlite3.OperationalError as error:
+			print("WARNING: {}".format(error))
+			return None
+
+		for row in cursor:
+			total = DeliveryMetricsPercentCompleteTotals()
+			total.issues, total.issues_closed, total.points, total.points_closed = row[1:5]
+			rollups[row[0]] = total
+
+		return rollups
+
+
+	def getColumnarTotals(self):
+
+		# issue history and epic mappings are read once and kept for later calculations with this object
+		if self.columnar_history is None:
+			self.columnar_history = DeliveryMetricsColumnarHistory(self.dbh)
+			self.columnar_history.load()
+			print("loaded {} fact row(s) into columnar history".format(self.columnar_history.size()))
+
+		# init data store: deliverable id -> totals
+		totals = dict()
+		for deliverable_id, values in self.columnar_history.deliverableTotals(self.max_effective_date).items():
+			total = DeliveryMetricsPercentCompleteTotals()
+			total.issues, total.issues_closed, total.points, total.points_closed = values
+			totals[deliverable_id] = total
+
+		return totals
+
+
+	def getIssuesByDeliverable(self, cursor, deliverable_ids, epics_by_deliverable):
+
+		# single query for all deliverables
+		if self.jobs == 1 or len(deliverable_ids) < 2:
+			issues_by_epic = self.getIssues(cursor, [e_id for e in epics_by_deliverable.values() for e_id in e])
+			for deliverable_id in deliverable_ids:
+				yield issues_by_epic
+			return
+
+		# one query per deliverable, spread across worker threads that each read through their own
+		# read-only connection; results are consumed in deliverable order, so output is deterministic
+		print("resolving issues with {} workers".format(self.jobs))
+		pool = DeliveryMetricsConnectionPool(self.config)
+		data_version = self.getDataVersion(cursor)
+
+		# each worker reads in its own transaction, and only if it sees the same data version as the caller's snapshot
+		def getDeliverableIssues(deliverable_id):
+			db = pool.database()
+			with db.transaction():
+				worker_cursor = db.cursor()
+				issues_by_epic = None
+				if self.getDataVersion(worker_cursor) == data_version:
+					issues_by_epic = self.getIssues(worker_cursor, list(epics_by_deliverable.get(deliverable_id, {}).keys()))
+				worker_cursor.close()
+			return issues_by_epic
+
+		# a load committed after the caller's snapshot was taken: read the issues of that deliverable through the caller's cursor
+		try:
+			with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+				for deliverable_id, issues_by_epic in zip(deliverable_ids, executor.map(getDeliverableIssues, deliverable_ids)):
+					if issues_by_epic is None:
+						print("WARNING: data changed since the report started, resolving issues of deliverable {} with a single worker".format(deliverable_id))
+						issues_by_epic = self.getIssues(cursor, list(epics_by_deliverable.get(deliverable_id, {}).keys()))
+					yield issues_by_epic
+		finally:
+			pool.disconnect()
+
+
+	def isCurrentStateEffective(self, cursor):
+
+		# current state tables hold the state as of the effective date only if nothing changed after it
+		sql = '''
+			select max(d_effective) from (
+				select max(d_effective) as d_effective from deliverable_quad_map_current
+				union all
+				select max(d_effective) from epic_deliverable_map_current
+				union all
+				select max(d_effective) from issue_history_current
+			)
+		'''
+
+		try:
+			latest_effective = cursor.execute(sql).fetchone()[0]
+		except sqlite3.OperationalError as error:
+			print("WARNING: {}".format(error))
+			return False
+
+		return latest_effective is not None and latest_effective <= self.max_effective_date
+
+
+	def latestFacts(self, table, entity_column, columns, entity_filter="true"):
+
+		# current state table holds exactly one row per entity: the latest one
+		if self.use_current_state:
+			return '''(
+				select {e}, {c}, d_effective from {t}_current where {f}
+			)'''.format(t=table, e=entity_column, c=columns, f=entity_filter)
+
+		# otherwise pick the latest row per entity as of effective date from history;
+		# history is read in (entity, d_effective) order, so the window needs no extra sort
+		return '''(
+				select {e}, {c}, d_effective from (
+					select
+						{e},
+						{c},
+						d_effective,
+						lead(d_effective) over (partition by {e} order by d_effective) as next_effective
+					from
+						{t}
+					where
+						d_effective <= :effective and
+						{f}
+				)
+				where next_effective is null
+			)'''.format(t=table, e=entity_column, c=columns, f=entity_filter)
+
+
+class DeliveryMetricsBurnUp:
+
+	# fields of each burn-up record, in output order
+	FIELDS = [
+		'date',
+		'quad',
+		'deliverable',
+		'issues',
+		'issues_closed',
+		'points',
+		'points_closed',
+	]
+
+	def __init__(self, config, date_from, date_to, writer=None):
+		self.config = config
+		self.dbh = DeliveryMetricsDatabase(config)
+		self.date_from = time.strftime("%Y-%m-%d", date_from)
+		self.date_to = time.strftime("%Y-%m-%d", date_to) if date_to is not None else config.effectiveDate()
+		self.writer = writer if writer is not None else DeliveryMetricsTextWriter(self.date_to, fields=self.FIELDS)
+
+		# state carried forward from one effective date to the next
+		self.deliverable_quad = dict()
+		self.epic_deliverable = dict()
+		self.issue_state = dict()
+		self.epic_totals = dict()
+		self.deliverable_totals = dict()
+
+
+	def calculate(self):
+
+		# initialize cursor
+		cursor = self.dbh.cursor()
+
+		# read names and start dates of quads and titles of deliverables
+		quads = dict()
+		for q_id, name, start_date in cursor.execute("select id, name, start_date from quad"):
+			quads[q_id] = (name, start_date)
+		deliverable_titles = dict(cursor.execute("select id, title from deliverable order by id").fetchall())
+
+		# read all facts up to the end of the series in a single pass, ordered by effective date
+		sql = '''
+			select d_effective, 0, deliverable_id, quad_id, null, null from deliverable_quad_map where d_effective <= :to
+			union all
+			select d_effective, 1, epic_id, deliverable_id, null, null from epic_deliverable_map where d_effective <= :to
+			union all
+			select h.d_effective, 2, h.issue_id, i.epic_id, h.points, h.is_closed from issue_history h inner join issue i on i.id = h.issue_id where h.d_effective <= :to
+			order by 1
+		'''
+		events = cursor.execute(sql, {'to': self.date_to})
+		event = next(events, None)
+
+		# sweep effective dates, applying the facts of each date before reporting it
+		for effective in self.dates():
+
+			while event is not None and event[0] <= effective:
+				self.applyEvent(event)
+				event = next(events, None)
+
+			for deliverable_id, title in deliverable_titles.items():
+				quad = quads.get(self.deliverable_quad.get(deliverable_id))
+				if quad is None or quad[1] is None or quad[1] > effective:
+					continue
+				total = self.deliverable_totals.get(deliverable_id) or DeliveryMetricsPercentCompleteTotals()
+				self.writer.writeRecord({
+					'date': effective,
+					'quad': quad[0],
+					'deliverable': title,
+					'issues': total.issues,
+					'issues_closed': total.issues_closed,
+					'points': total.points,
+					'points_closed': total.points_closed,
+				})
+
+		# close cursor and finish output
+		cursor.close()
+		self.writer.close()
+
+
+	def dates(self):
+
+		# every calendar day in the series
+		day = datetime.date.fromisoformat(self.date_from)
+		last_day = datetime.date.fromisoformat(self.date_to)
+		while day <= last_day:
+			yield day.isoformat()
+			day += datetime.timedelta(days=1)
+
+
+	def applyEvent(self, event):
+
+		effective, kind, entity_id, target_id, points, is_closed = event
+
+		# deliverable moved to a quad
+		if kind == 0:
+			self.deliverable_quad[entity_id] = target_id
+
+		# epic moved to a deliverable: move its totals along
+		elif kind == 1:
+			old_deliverable_id = self.epic_deliverable.get(entity_id)
+			self.epic_deliverable[entity_id] = target_id
+			epic_total = self.epic_totals.get(entity_id)
+			if epic_total is not None and old_deliverable_id != target_id:
+				self._totals(self.deliverable_totals, old_deliverable_id).addTotals(epic_total, -1)
+				self._totals(self.deliverable_totals, target_id).addTotals(epic_total)
+
+		# issue changed: replace its previous state in the totals of its epic and deliverable
+		elif kind == 2 and target_id is not None:
+			old_state = self.issue_state.get(entity_id)
+			new_state = (points or 0, bool(is_closed))
+			self.issue_state[entity_id] = new_state
+			deliverable_id = self.epic_deliverable.get(target_id)
+			for totals, key in ((self.epic_totals, target_id), (self.deliverable_totals, deliverable_id)):
+				total = self._totals(totals, key)
+				if old_state is not None:
+					total.addIssue(*old_state, -1)
+				total.addIssue(*new_state)
+
+
+	def _totals(self, totals, key):
+
+		if key not in totals:
+			totals[key] = DeliveryMetricsPercentCompleteTotals()
+
+		return totals[key]
+
+
 class DeliveryMetricsPercentCompleteTotals:
 
 	def __init__(self):
@@ -224,23 +669,38 @@ class DeliveryMetricsPercentCompleteTotals:
 		self.points = 0
 		self.points_closed = 0
 
-	
-	def printResults(self):
 
-		percent_complete_issues = 0
-		percent_complete_points = 0
+	def addIssue(self, points, closed, sign=1):
+
+		self.issues += sign
+		self.points += sign * points
+		if closed:
+			self.issues_closed += sign
+			self.points_closed += sign * points
+
+
+	def addTotals(self, other, sign=1):
+
+		self.issues += sign * other.issues
+		self.issues_closed += sign * other.issues_closed
+		self.points += sign * other.points
+		self.points_closed += sign * other.points_closed
+
+
+	def percentCompleteIssues(self):
 
 		if self.issues > 0:
-			percent_complete_issues = round(100*(self.issues_closed / self.issues), 1)
+			return round(100*(self.issues_closed / self.issues), 1)
+
+		return 0
+
+
+	def percentCompletePoints(self):
+
 		if self.points > 0:
-			percent_complete_points = round(100*(self.points_closed / self.points), 1)
+			return round(100*(self.points_closed / self.points), 1)
 
-		print("\t\tTotal Issues: {}".format(str(self.issues)))
-		print("\t\tTotal Issues Closed: {}".format(str(self.issues_closed)))
-		print("\t\tIssues Complete: {}%".format(str(percent_complete_issues)))
-		print("\t\tTotal Points: {}".format(str(self.points)))
-		print("\t\tTotal Points Closed: {}".format(str(self.points_closed)))
-		print("\t\tPoints Complete: {}%".format(str(percent_complete_points)))
+		return 0
 
 
 if __name__ == "__main__":
@@ -254,24 +714,47 @@ if __name__ == "__main__":
 	parser = ArgumentParser(description="Calculate % complete of deliverables in delivery metrics database")
 	parser.add_argument("-e", dest="yyyymmdd", type=parseDateArg, help="effective date to use in metrics calculation")
 	parser.add_argument("-v", "--verbose", action="store_true", help="increase output verbosity")
+	parser.add_argument("-p", "--profile", default="read-mostly", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: read-mostly)")
+	parser.add_argument("--from", dest="date_from", type=parseDateArg, help="first effective date of a burn-up series, one row per deliverable per day")
+	parser.add_argument("--to", dest="date_to", type=parseDateArg, help="last effective date of a burn-up series (default: effective date)")
+	parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="always recalculate instead of reading cached results")
+	parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker threads resolving issues, one deliverable at a time; verbose mode only, not with --from (default: 1)")
+	parser.add_argument("-c", "--columnar", action="store_true", help="calculate deliverable totals from issue history loaded into memory instead of reading daily rollups")
+	parser.add_argument("-f", "--format", default="text", choices=OUTPUT_WRITERS.keys(), help="output format of percent complete results and burn-up series (default: text)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
 
 	# get command line args
 	args = parser.parse_args()
+	if args.jobs > 1 and (not args.verbose or args.date_from is not None):
+		parser.error("-j/--jobs only applies in verbose mode (-v) without --from: deliverable totals are read from daily rollups or calculated in memory")
 
 	# initialize config object
-	config = DeliveryMetricsConfig(args.yyyymmdd)
+	config = DeliveryMetricsConfig(args.yyyymmdd, args.profile, args.db_path)
 	
-	# calculate metrics
-	print("...")
-	print("calculating metrics with effective date <= {}".format(config.effectiveDate()))
-	print("verbose mode is {state}".format(state="ON" if args.verbose else "OFF"))
-	metrics = DeliveryMetricsPercentComplete(config, args.verbose)
-	metrics.calculate()
-	metrics = None
-	print("metrics calculations are done")
-
-	# measure execution time
-	elapsed_time = round(time.perf_counter() - perf_start, 4)
-	print("elapsed time: {} seconds".format(elapsed_time))
+	# machine-readable formats keep stdout for results, so status messages go to stderr
+	results_file = sys.stdout
+	status_file = sys.stdout if args.format == "text" else sys.stderr
+
+	with contextlib.redirect_stdout(status_file):
+
+		# calculate burn-up series or metrics as of a single date
+		print("...")
+		if args.date_from is not None:
+			writer = OUTPUT_WRITERS[args.format](config.effectiveDate(), results_file, DeliveryMetricsBurnUp.FIELDS)
+			metrics = DeliveryMetricsBurnUp(config, args.date_from, args.date_to, writer)
+			print("calculating burn-up series from {} to {}".format(metrics.date_from, metrics.date_to))
+		else:
+			print("calculating metrics with effective date <= {}".format(config.effectiveDate()))
+			print("verbose mode is {state}".format(state="ON" if args.verbose else "OFF"))
+			writer = OUTPUT_WRITERS[args.format](config.effectiveDate(), results_file)
+			metrics = DeliveryMetricsPercentComplete(config, args.verbose, args.use_cache, writer, args.jobs, args.columnar)
+		DeliveryMetricsSchema(metrics.dbh).requireCurrent()
+		metrics.calculate()
+		metrics = None
+		print("metrics calculations are done")
+
+		# measure execution time
+		elapsed_time = round(time.perf_counter() - perf_start, 4)
+		print("elapsed time: {} seconds".format(elapsed_time))
 
 
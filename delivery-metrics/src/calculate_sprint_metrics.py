@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(abspath(__file__)) + '/loader')
+
+from argparse import ArgumentParser
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_database import DeliveryMetricsDatabase
+from delivery_metrics_output_writer import OUTPUT_WRITERS
+from delivery_metrics_schema import DeliveryMetricsSchema
+import contextlib
+import datetime
+import time
+
+
+class DeliveryMetricsSprintMetrics:
+
+	# fields of each sprint record, in output order
+	FIELDS = [
+		'sprint',
+		'quad',
+		'start_date',
+		'end_date',
+		'status',
+		'committed_issues',
+		'committed_points',
+		'added_issues',
+		'completed_issues',
+		'completed_points',
+		'carry_over_issues',
+		'carry_over_points',
+		'percent_complete_points',
+		'velocity',
+	]
+
+	def __init__(self, config, writer, window=3):
+		self.config = config
+		self.dbh = DeliveryMetricsDatabase(config)
+		self.max_effective_date = config.effectiveDate()
+		self.writer = writer
+		self.window = max(1, window)
+
+		# state carried forward from one effective date to the next
+		self.issue_sprint = dict()
+		self.sprint_issues = dict()
+		self.issue_state = dict()
+
+
+	def calculate(self):
+
+		# initialize cursor
+		cursor = self.dbh.cursor()
+
+		# sprints that started on or before effective date, in start date order
+		sql = '''
+			select
+				s.id,
+				s.name,
+				s.start_date,
+				s.end_date,
+				q.name
+			from
+				sprint s
+			left join quad q on q.id = s.quad_id
+			where
+				s.start_date <= ?
+			order by s.start_date, s.name
+		'''
+		sprints = cursor.execute(sql, (self.max_effective_date,)).fetchall()
+
+		# commitment is taken on the first day of a sprint, results on its last day (the day before the next sprint starts),
+		# or on the effective date for a sprint that is still running
+		checkpoints = []
+		for sprint_id, name, start_date, end_date, quad_name in sprints:
+			checkpoints.append((start_date, 0, sprint_id))
+			checkpoints.append((self.lastDay(start_date, end_date), 1, sprint_id))
+		checkpoints.sort()
+
+		# read sprint assignments and issue history up to the effective date in a single pass, ordered by effective date
+		sql = '''
+			select d_effective, 0, issue_id, sprint_id, null, null from issue_sprint_map where d_effective <= :effective
+			union all
+			select d_effective, 1, issue_id, null, points, is_closed from issue_history where d_effective <= :effective
+			order by 1
+		'''
+		events = cursor.execute(sql, {'effective': self.max_effective_date})
+		event = next(events, None)
+
+		# sweep checkpoints, applying the facts of each date before evaluating it
+		committed = dict()
+		results = dict()
+		for effective, kind, sprint_id in checkpoints:
+
+			while event is not None and event[0] <= effective:
+				self.applyEvent(event)
+				event = next(events, None)
+
+			issues = self.sprint_issues.get(sprint_id, set())
+			if kind == 0:
+				committed[sprint_id] = (set(issues), sum(self.issue_state.get(i, (0, False))[0] for i in issues))
+			else:
+				results[sprint_id] = self.sprintResults(*committed.get(sprint_id, (set(), 0)), issues)
+
+		# close cursor
+		cursor.close()
+
+		# output one record per sprint; velocity is the average of completed points over the last closed sprints
+		completed_points = []
+		for sprint_id, name, start_date, end_date, quad_name in sprints:
+			result = results.get(sprint_id)
+			if result is None:
+				continue
+			status = 'active' if end_date is None or end_date > self.max_effective_date else 'closed'
+			if status == 'closed':
+				completed_points.append(result['completed_points'])
+			recent = completed_points[-self.window:]
+			record = {
+				'sprint': name,
+				'quad': quad_name,
+				'start_date': start_date,
+				'end_date': end_date,
+				'status': status,
+				'velocity': round(sum(recent) / len(recent), 1) if len(recent) > 0 else None,
+			}
+			record.update(result)
+			self.writer.writeRecord(record)
+
+		self.writer.close()
+
+		# output if no results found
+		if len(results) == 0:
+			print("no results found")
+
+
+	def lastDay(self, start_date, end_date):
+
+		if end_date is None:
+			return self.max_effective_date
+
+		last_day = (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=1)).isoformat()
+		return min(max(last_day, start_date), self.max_effective_date)
+
+
+	def applyEvent(self, event):
+
+		effective, kind, issue_id, sprint_id, points, is_closed = event
+
+		# issue moved to a sprint
+		if kind == 0:
+			old_sprint_id = self.issue_sprint.get(issue_id)
+			if old_sprint_id is not None:
+				self.sprint_issues[old_sprint_id].discard(issue_id)
+			self.issue_sprint[issue_id] = sprint_id
+			if sprint_id is not None:
+				self.sprint_issues.setdefault(sprint_id, set()).add(issue_id)
+
+		# issue changed
+		else:
+			self.issue_state[issue_id] = (points or 0, bool(is_closed))
+
+
+	def sprintResults(self, committed, committed_points, issues):
+
+		# issues in the sprint on its last day are either completed or carried over
+		result = {
+			'committed_issues': len(committed),
+			'committed_points': committed_points,
+			'added_issues': len(issues - committed),
+			'completed_issues': 0,
+			'completed_points': 0,
+			'carry_over_issues': 0,
+			'carry_over_points': 0,
+		}
+
+		for issue_id in issues:
+			points, closed = self.issue_state.get(issue_id, (0, False))
+			if closed:
+				result['completed_issues'] += 1
+				result['completed_points'] += points
+			else:
+				result['carry_over_issues'] += 1
+				result['carry_over_points'] += points
+
+		result['percent_complete_points'] = round(100*(result['completed_points'] / result['committed_points']), 1) if result['committed_points'] > 0 else 0
+
+		return result
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	def parseDateArg(d):
+		return time.strptime(d, '%Y%m%d')
+
+	# define command line args
+	parser = ArgumentParser(description="Calculate sprint commitment, completion, carry-over and velocity from delivery metrics database")
+	parser.add_argument("-e", dest="yyyymmdd", type=parseDateArg, help="effective date to use in metrics calculation")
+	parser.add_argument("-n", "--window", type=int, default=3, help="number of sprints to average velocity over (default: 3)")
+	parser.add_argument("-p", "--profile", default="read-mostly", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: read-mostly)")
+	parser.add_argument("-f", "--format", default="text", choices=OUTPUT_WRITERS.keys(), help="output format of sprint results (default: text)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
+
+	# get command line args
+	args = parser.parse_args()
+
+	# initialize config object
+	config = DeliveryMetricsConfig(args.yyyymmdd, args.profile, args.db_path)
+
+	# machine-readable formats keep stdout for results, so status messages go to stderr
+	results_file = sys.stdout
+	status_file = sys.stdout if args.format == "text" else sys.stderr
+
+	with contextlib.redirect_stdout(status_file):
+
+		# calculate sprint metrics
+		print("...")
+		print("calculating sprint metrics with effective date <= {}".format(config.effectiveDate()))
+		writer = OUTPUT_WRITERS[args.format](config.effectiveDate(), results_file, DeliveryMetricsSprintMetrics.FIELDS)
+		metrics = DeliveryMetricsSprintMetrics(config, writer, args.window)
+		DeliveryMetricsSchema(metrics.dbh).requireCurrent()
+		metrics.calculate()
+		metrics = None
+		print("metrics calculations are done")
+
+		# measure execution time
+		elapsed_time = round(time.perf_counter() - perf_start, 4)
+		print("elapsed time: {} seconds".format(elapsed_time))
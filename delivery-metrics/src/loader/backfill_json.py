@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_loader import DeliveryMetricsDataLoader
+import os
+import re
+import sys
+import time
+
+# dated snapshot file names, e.g. export-20241007.json or 2024-10-07.jsonl
+SNAPSHOT_DATE_PATTERN = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+SNAPSHOT_EXTENSIONS = ('.json', '.jsonl')
+
+
+def parseDate(d):
+	match = SNAPSHOT_DATE_PATTERN.search(d)
+	if match is None:
+		return None
+	try:
+		return time.strptime("".join(match.groups()), '%Y%m%d')
+	except ValueError:
+		return None
+
+
+def findSnapshotsInDirectory(dir_path):
+
+	snapshots = []
+	for file_name in sorted(os.listdir(dir_path)):
+		if not file_name.endswith(SNAPSHOT_EXTENSIONS):
+			continue
+		effective = parseDate(file_name)
+		if effective is None:
+			print("WARNING: skipping file without a date in its name: {}".format(file_name))
+			continue
+		snapshots.append((effective, os.path.join(dir_path, file_name)))
+
+	return snapshots
+
+
+def readSnapshotManifest(manifest_path):
+
+	# each line is "YYYYMMDD path", relative paths are resolved against the manifest's directory
+	snapshots = []
+	base_dir = os.path.dirname(manifest_path)
+	with open(manifest_path, 'r') as f:
+		for line_number, line in enumerate(f, start=1):
+			line = line.strip()
+			if not line or line.startswith('#'):
+				continue
+			fields = re.split(r'[\s,]+', line, maxsplit=1)
+			effective = parseDate(fields[0])
+			if effective is None or len(fields) < 2:
+				print("FATAL: invalid manifest entry on line {}: {}".format(line_number, line))
+				sys.exit()
+			snapshots.append((effective, os.path.join(base_dir, fields[1])))
+
+	return snapshots
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Load a series of dated json snapshots into the delivery metrics database in effective date order")
+	parser.add_argument("path", metavar="PATH", help="directory of dated snapshot files, or manifest file with one 'YYYYMMDD path' entry per line")
+	parser.add_argument("-p", "--profile", default="bulk-load", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: bulk-load)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
+	parser.add_argument("-m", "--metrics-file", dest="metrics_file", metavar="FILEPATH", help="append a json record of run metrics to this file")
+	parser.add_argument("-i", "--incremental", action="store_true", help="only load items that were added or changed since the previous snapshot")
+
+	# get command line args
+	args = parser.parse_args()
+
+	# find snapshots and sort by effective date
+	path = os.path.abspath(args.path)
+	if os.path.isdir(path):
+		snapshots = findSnapshotsInDirectory(path)
+	elif os.path.isfile(path):
+		snapshots = readSnapshotManifest(path)
+	else:
+		print("FATAL: no such file or directory: {}".format(path))
+		sys.exit()
+	snapshots.sort(key=lambda snapshot: snapshot[0])
+
+	# validate
+	dates = [time.strftime("%Y-%m-%d", effective) for effective, file_path in snapshots]
+	if len(set(dates)) != len(dates):
+		print("FATAL: more than one snapshot found for the same effective date")
+		sys.exit()
+	print("...\nfound {} snapshot(s) to load".format(len(snapshots)))
+
+	# load each snapshot in its own transaction, reusing one loader so the connection,
+	# dimension cache and snapshot digest carry over from one snapshot to the next
+	config = DeliveryMetricsConfig(None, args.profile, args.db_path)
+	loader = DeliveryMetricsDataLoader(config, None, args.incremental)
+	for effective, file_path in snapshots:
+		config.setEffectiveDate(effective)
+		print("...\nrunning data loader with effective date {}".format(config.effectiveDate()))
+		loader.setFilePath(file_path)
+		loader.loadData()
+		loader.metrics.emit(args.metrics_file)
+	loader = None
+
+	print("backfill is done")
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
@@ -0,0 +1,151 @@
+from array import array
+from bisect import bisect_right
+import datetime
+
+# numpy is optional: without it, the same arrays are searched one entity at a time
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# spacing of entity positions in the combined (entity, day) search key; larger than any day ordinal
+DAY_SPAN = 1 << 22
+
+class DeliveryMetricsColumnarHistory:
+
+	def __init__(self, dbh):
+		self._dbh = dbh
+		self.history = None
+		self.epic_map = None
+		self.issue_epic = None
+
+
+	""" public methods """
+
+
+	def load(self) -> None:
+
+		cursor = self._dbh.cursor()
+
+		# facts sorted by entity and effective date, one array per column
+		self.history = self._readFacts(cursor, "select issue_id, d_effective, points, is_closed from issue_history order by issue_id, d_effective", (0, 0))
+		self.epic_map = self._readFacts(cursor, "select epic_id, d_effective, deliverable_id from epic_deliverable_map order by epic_id, d_effective", (-1,))
+
+		# position of the epic of each issue in the epic map, or -1
+		epic_positions = dict((epic_id, i) for i, epic_id in enumerate(self.epic_map['entities']))
+		issue_epics = dict(cursor.execute("select id, epic_id from issue where epic_id is not null").fetchall())
+		self.issue_epic = array('q', (epic_positions.get(issue_epics.get(issue_id), -1) for issue_id in self.history['entities']))
+
+		cursor.close()
+
+		if numpy is not None:
+			for facts in (self.history, self.epic_map):
+				facts['keys'] = numpy.repeat(numpy.arange(len(facts['entities']), dtype=numpy.int64), numpy.diff(facts['offsets'])) * DAY_SPAN + facts['days']
+			self.issue_epic = numpy.asarray(self.issue_epic)
+
+
+	def size(self) -> int:
+
+		return len(self.history['days']) + len(self.epic_map['days'])
+
+
+	def deliverableTotals(self, effective: str) -> dict:
+
+		# deliverable id -> (issues, issues_closed, points, points_closed) as of effective date
+		day = datetime.date.fromisoformat(effective).toordinal()
+		epic_rows = self._asOf(self.epic_map, day)
+		issue_rows = self._asOf(self.history, day)
+
+		if numpy is not None:
+			return self._aggregateVectorized(epic_rows, issue_rows)
+
+		totals = dict()
+		epic_deliverables = self.epic_map['values'][0]
+		points, closed = self.history['values']
+		for issue, row in enumerate(issue_rows):
+			epic = self.issue_epic[issue]
+			if row < 0 or epic < 0 or epic_rows[epic] < 0:
+				continue
+			deliverable_id = epic_deliverables[epic_rows[epic]]
+			if deliverable_id < 0:
+				continue
+			total = totals.get(deliverable_id, (0, 0, 0, 0))
+			totals[deliverable_id] = (total[0] + 1, total[1] + closed[row], total[2] + points[row], total[3] + points[row] * closed[row])
+
+		return totals
+
+
+	""" private methods """
+
+
+	def _readFacts(self, cursor, sql: str, nulls: tuple) -> dict:
+
+		# rows are (entity id, effective date, value...); a null value is stored as the matching element of nulls
+		entities = array('q')
+		offsets = array('q')
+		days = array('l')
+		values = [array('q') for null in nulls]
+		for row in cursor.execute(sql):
+			if len(entities) == 0 or entities[-1] != row[0]:
+				entities.append(row[0])
+				offsets.append(len(days))
+			days.append(datetime.date.fromisoformat(row[1]).toordinal())
+			for i, null in enumerate(nulls):
+				value = row[2 + i]
+				values[i].append(int(value) if value is not None else null)
+		offsets.append(len(days))
+
+		facts = {
+			'entities': entities,
+			'offsets': offsets,
+			'days': days,
+			'values': values
+		}
+		if numpy is not None:
+			for key in ('offsets', 'days'):
+				facts[key] = numpy.asarray(facts[key], dtype=numpy.int64)
+			facts['values'] = [numpy.asarray(v, dtype=numpy.int64) for v in values]
+
+		return facts
+
+
+	def _asOf(self, facts: dict, day: int):
+
+		# index of the latest row of each entity on or before day, or -1
+		offsets = facts['offsets']
+		if numpy is not None:
+			starts = offsets[:-1]
+			rows = numpy.searchsorted(facts['keys'], numpy.arange(len(starts), dtype=numpy.int64) * DAY_SPAN + day, side='right') - 1
+			rows[rows < starts] = -1
+			return rows
+
+		days = facts['days']
+		rows = array('q')
+		for i in range(len(offsets) - 1):
+			row = bisect_right(days, day, offsets[i], offsets[i + 1]) - 1
+			rows.append(row if row >= offsets[i] else -1)
+
+		return rows
+
+
+	def _aggregateVectorized(self, epic_rows, issue_rows) -> dict:
+
+		# deliverable of each epic as of day, then of each issue through its epic
+		epic_deliverables = numpy.where(epic_rows >= 0, self.epic_map['values'][0][epic_rows], -1)
+		valid = (issue_rows >= 0) & (self.issue_epic >= 0)
+		deliverables = numpy.full(len(issue_rows), -1, dtype=numpy.int64)
+		deliverables[valid] = epic_deliverables[self.issue_epic[valid]]
+		valid &= deliverables >= 0
+
+		# sum issues and points per deliverable
+		points = self.history['values'][0][issue_rows[valid]]
+		closed = self.history['values'][1][issue_rows[valid]]
+		deliverable_ids, groups = numpy.unique(deliverables[valid], return_inverse=True)
+		columns = (
+			numpy.bincount(groups, minlength=len(deliverable_ids)),
+			numpy.bincount(groups, weights=closed, minlength=len(deliverable_ids)),
+			numpy.bincount(groups, weights=points, minlength=len(deliverable_ids)),
+			numpy.bincount(groups, weights=points * closed, minlength=len(deliverable_ids)),
+		)
+
+		return dict((int(d_id), tuple(int(c[i]) for c in columns)) for i, d_id in enumerate(deliverable_ids))
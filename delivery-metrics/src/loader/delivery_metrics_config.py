@@ -3,17 +3,48 @@ import time
 
 class DeliveryMetricsConfig:
 
-	def __init__(self, datestamp):
+	# named sqlite performance profiles; pragmas are applied in order at connect time
+	# (busy_timeout comes first so that switching journal mode waits for other connections)
+	PROFILES = {
+		'safe': {
+			'busy_timeout': 5000,
+			'journal_mode': 'wal',
+			'synchronous': 'full',
+		},
+		'bulk-load': {
+			'busy_timeout': 30000,
+			'journal_mode': 'wal',
+			'synchronous': 'normal',
+			'cache_size': -262144,
+			'mmap_size': 268435456,
+			'temp_store': 'memory',
+		},
+		'read-mostly': {
+			'busy_timeout': 30000,
+			'journal_mode': 'wal',
+			'synchronous': 'normal',
+			'cache_size': -65536,
+			'mmap_size': 1073741824,
+			'temp_store': 'memory',
+		},
+	}
+
+	def __init__(self, datestamp, profile='safe', db_path=None):
 
 		# path to sqlite db instance
-		self._DB_PATH = dirname(dirname(dirname(abspath(__file__)))) + "/db/delivery_metrics.db"
+		if db_path is not None:
+			self._DB_PATH = abspath(db_path)
+		else:
+			self._DB_PATH = dirname(dirname(dirname(abspath(__file__)))) + "/db/delivery_metrics.db"
 
 		# datestamp to use as "effective date" when writing facts to db
-		if isinstance(datestamp, time.struct_time):
-			self._EFFECTIVE_DATE = time.strftime("%Y-%m-%d", datestamp)
-		else:
-			t = time.gmtime()
-			self._EFFECTIVE_DATE = time.strftime("%Y-%m-%d", t)
+		self.setEffectiveDate(datestamp)
+
+		# sqlite performance profile to apply when connecting
+		if profile not in self.PROFILES:
+			print("WARNING: unknown sqlite profile '{}', using 'safe'".format(profile))
+			profile = 'safe'
+		self._PROFILE = profile
 
 
 	def dbPath(self):
@@ -22,4 +53,20 @@ class DeliveryMetricsConfig:
 	
 	def effectiveDate(self):
 		return self._EFFECTIVE_DATE
-	
+
+
+	def setEffectiveDate(self, datestamp):
+
+		if isinstance(datestamp, time.struct_time):
+			self._EFFECTIVE_DATE = time.strftime("%Y-%m-%d", datestamp)
+		else:
+			t = time.gmtime()
+			self._EFFECTIVE_DATE = time.strftime("%Y-%m-%d", t)
+
+
+	def profile(self):
+		return self._PROFILE
+
+
+	def pragmas(self):
+		return self.PROFILES[self._PROFILE]
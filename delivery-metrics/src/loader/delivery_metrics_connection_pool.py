@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_database import DeliveryMetricsDatabase
+
+class DeliveryMetricsConnectionPool:
+
+	def __init__(self, config: DeliveryMetricsConfig):
+
+		self.config = config
+		self._local = threading.local()
+		self._databases = []
+		self._lock = threading.Lock()
+
+
+	def __del__(self):
+
+		self.disconnect()
+
+
+	def database(self) -> DeliveryMetricsDatabase:
+
+		# sqlite connections cannot be shared across threads, so each thread opens its own read-only connection
+		db = getattr(self._local, 'db', None)
+		if db is None:
+			db = DeliveryMetricsDatabase(self.config, read_only=True)
+			self._local.db = db
+			with self._lock:
+				self._databases.append(db)
+
+		return db
+
+
+	def cursor(self) -> sqlite3.Cursor:
+
+		return self.database().cursor()
+
+
+	def size(self) -> int:
+
+		return len(self._databases)
+
+
+	def disconnect(self) -> None:
+
+		with self._lock:
+			for db in self._databases:
+				db.disconnect()
+			self._databases = []
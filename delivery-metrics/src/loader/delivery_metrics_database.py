@@ -1,13 +1,17 @@
 import sqlite3
 import sys
+from contextlib import contextmanager
 from delivery_metrics_config import DeliveryMetricsConfig
 
 class DeliveryMetricsDatabase:
 
-	def __init__(self, config: DeliveryMetricsConfig):
+	def __init__(self, config: DeliveryMetricsConfig, read_only: bool = False):
 
 		self.config = config
+		self.read_only = read_only
 		self._dbConnection = None
+		self._inTransaction = False
+		self._traceCallback = None
 
 
 	def __del__(self):
@@ -24,11 +28,15 @@ class DeliveryMetricsDatabase:
 
 		if not self._dbConnection:
 			try:
-				db_uri = "file:{}?mode=rw".format(self.config.dbPath())
+				db_uri = "file:{}?mode={}".format(self.config.dbPath(), "ro" if self.read_only else "rw")
 				print("connecting to database '{}'".format(db_uri))
-				self._dbConnection = sqlite3.connect(db_uri, uri=True)
+				# read-only connections may be opened in a worker thread and closed by the thread that owns the pool
+				self._dbConnection = sqlite3.connect(db_uri, uri=True, isolation_level=None, check_same_thread=not self.read_only)
 			except sqlite3.Error as error:
 				print("WARNING: {}: {}".format(error, self.config.dbPath()))
+			else:
+				self._dbConnection.set_trace_callback(self._traceCallback)
+				self._applyProfile()
 
 		return self._dbConnection
 	
@@ -45,6 +53,62 @@ class DeliveryMetricsDatabase:
 			print("WARNING: {}".format(error))
 
 
+	@contextmanager
+	def transaction(self):
+
+		# open a single transaction that is committed only if the whole block succeeds
+		if self._inTransaction:
+			yield self
+			return
+
+		# fail like cursor() if the database cannot be opened
+		if self.connection() is None:
+			print("FATAL: cannot begin database transaction")
+			sys.exit()
+
+		self._dbConnection.execute("begin")
+		self._inTransaction = True
+		try:
+			yield self
+		except BaseException:
+			print("WARNING: rolling back transaction")
+			self._dbConnection.execute("rollback")
+			raise
+		else:
+			self._dbConnection.execute("commit")
+		finally:
+			self._inTransaction = False
+
+
+	@contextmanager
+	def savepoint(self, name: str):
+
+		# nested unit of work that can be rolled back without ending the enclosing transaction
+		self.connection().execute("savepoint {}".format(name))
+		try:
+			yield self
+		except BaseException:
+			print("WARNING: rolling back to savepoint '{}'".format(name))
+			self._dbConnection.execute("rollback to {}".format(name))
+			self._dbConnection.execute("release {}".format(name))
+			raise
+		else:
+			self._dbConnection.execute("release {}".format(name))
+
+
+	def inTransaction(self) -> bool:
+
+		return self._inTransaction
+
+
+	def setTraceCallback(self, callback) -> None:
+
+		# callback is invoked with the text of every sql statement executed on this connection
+		self._traceCallback = callback
+		if self._dbConnection is not None:
+			self._dbConnection.set_trace_callback(callback)
+
+
 	def cursor(self) -> sqlite3.Cursor:
 
 		db_cursor = None
@@ -57,6 +121,17 @@ class DeliveryMetricsDatabase:
 		return db_cursor
 
 
+	def _applyProfile(self) -> None:
+
+		# apply pragmas of the configured sqlite performance profile
+		print("applying sqlite profile '{}'".format(self.config.profile()))
+		for pragma, value in self.config.pragmas().items():
+			try:
+				self._dbConnection.execute("pragma {} = {}".format(pragma, value))
+			except sqlite3.Error as error:
+				print("WARNING: unable to set pragma {}: {}".format(pragma, error))
+
+
 	def disconnect(self) -> None:
 	
 		if self._dbConnection is not None:
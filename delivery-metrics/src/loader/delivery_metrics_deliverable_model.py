@@ -9,20 +9,11 @@ class DeliveryMetricsDeliverableModel(DeliveryMetricsModel):
 		if not isinstance(deliverable, dict):
 			return None, DeliveryMetricsChangeType.NONE
 
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
 		# get cursor to keep open across transactions
 		cursor = self.cursor()
 
-		# insert dimensions
-		deliverable_id = self._insertDimensions(cursor, deliverable)
-		if deliverable_id is not None:
-			change_type = DeliveryMetricsChangeType.INSERT
-
-		# if insert failed, select and update
-		if deliverable_id is None:
-			deliverable_id, change_type = self._updateDimensions(cursor, deliverable)
+		# insert or update dimensions as decided by the dimension cache
+		deliverable_id, change_type = self.syncDimension(cursor, 'deliverable', deliverable)
 
 		# insert facts 
 		if deliverable_id is not None:
@@ -34,19 +25,45 @@ class DeliveryMetricsDeliverableModel(DeliveryMetricsModel):
 		return deliverable_id, change_type
 
 
-	def _insertDimensions(self, cursor, deliverable: dict) -> int:
+	def syncDeliverables(self, deliverables: list) -> (dict, int, int):
 
-		# get values needed for sql statement
-		guid = deliverable.get('guid')
-		title = deliverable.get('title')
-		pillar = deliverable.get('pillar')
+		# get cursor to keep open across transactions
+		cursor = self.cursor()
+
+		# insert or update changed dimensions in bulk
+		guid_map, insert_count, update_count = self.syncDimensions(cursor, 'deliverable', deliverables)
+
+		# keep only facts that changed since the latest stored state
+		facts = []
+		for deliverable in deliverables:
+			deliverable_id = guid_map.get(deliverable.get('guid')) if isinstance(deliverable, dict) else None
+			if deliverable_id is not None:
+				facts.append((deliverable_id, (deliverable.get('quad_id'),)))
+		rows = self.changedFacts('deliverable_quad_map', facts)
+
+		# stage and upsert facts: deliverable_quad_map
+		if len(rows) > 0:
+			self.stageRows(cursor, "stage_deliverable_quad_map", "deliverable_id integer, quad_id integer, row_hash text", rows)
+			fact_sql = '''
+				insert into deliverable_quad_map (deliverable_id, quad_id, row_hash, d_effective)
+				select deliverable_id, quad_id, row_hash, ? from stage_deliverable_quad_map where true
+				on conflict(deliverable_id, d_effective) do update set (quad_id, row_hash, t_modified) = (excluded.quad_id, excluded.row_hash, current_timestamp)
+			'''
+			cursor.execute(fact_sql, (self.getEffectiveDate(),))
+			self.upsertCurrentFacts(cursor, 'deliverable_quad_map', rows)
+
+		# close cursor
+		cursor.close()
+
+		return guid_map, insert_count, update_count
 
-		# insert into dimension table: deliverable
-		insert_sql = "insert into deliverable(guid, title, pillar) values (?, ?, ?) on conflict(guid) do nothing returning id"
-		insert_data = (guid, title, pillar)
-		deliverable_id = self.insertWithCursor(cursor, insert_sql, insert_data)
 
-		return deliverable_id
+	def dimensionValues(self, deliverable: dict) -> tuple:
+
+		return (
+			deliverable.get('title'),
+			deliverable.get('pillar')
+		)
 
 
 	def _insertFacts(self, cursor, deliverable_id: int, deliverable: dict) -> int:
@@ -55,39 +72,16 @@ class DeliveryMetricsDeliverableModel(DeliveryMetricsModel):
 		quad_id = deliverable.get('quad_id')
 		effective = self.getEffectiveDate()
 
+		# skip fact if unchanged since the latest stored state
+		row_hash = self.factHashIfChanged('deliverable_quad_map', deliverable_id, (quad_id,))
+		if row_hash is None:
+			return None
+
 		# insert into fact table: deliverable_quad_map
-		insert_sql = "insert into deliverable_quad_map(deliverable_id, quad_id, d_effective) values (?, ?, ?) on conflict(deliverable_id, d_effective) do update set (quad_id, t_modified) = (?, current_timestamp) returning id"
-		insert_data = (deliverable_id, quad_id, effective, quad_id)
+		insert_sql = "insert into deliverable_quad_map(deliverable_id, quad_id, row_hash, d_effective) values (?, ?, ?, ?) on conflict(deliverable_id, d_effective) do update set (quad_id, row_hash, t_modified) = (?, ?, current_timestamp) returning id"
+		insert_data = (deliverable_id, quad_id, row_hash, effective, quad_id, row_hash)
 		map_id = self.insertWithCursor(cursor, insert_sql, insert_data)
+		self.upsertCurrentFacts(cursor, 'deliverable_quad_map', [(deliverable_id, quad_id, row_hash)])
+		self.putFact('deliverable_quad_map', deliverable_id, row_hash)
 
 		return map_id
-
-
-	def _updateDimensions(self, cursor, deliverable: dict) -> (int, DeliveryMetricsChangeType):
-
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
-		# get values needed for sql statement
-		guid = deliverable.get('guid')
-		new_title = deliverable.get('title')
-		new_pillar = deliverable.get('pillar')
-		new_values = (new_title, new_pillar)
-
-		# select
-		select_sql = "select id, title, pillar from deliverable where guid = ?"
-		select_data = (guid,)
-		cursor.execute(select_sql, select_data)
-		deliverable_id, old_title, old_pillar = cursor.fetchone()
-		old_values = (old_title, old_pillar)
-
-		# compare
-		if deliverable_id is not None:
-			if (new_values != old_values):
-				change_type = DeliveryMetricsChangeType.UPDATE
-				sql_update = "update deliverable set title = ?, pillar = ?, t_modified = current_timestamp where id = ?"
-				data_update = (new_title, new_pillar, deliverable_id)
-				cursor.execute(sql_update, data_update)
-
-		return deliverable_id, change_type
-
@@ -0,0 +1,120 @@
+from delivery_metrics_model import DeliveryMetricsChangeType
+
+class DeliveryMetricsDimensionCache:
+
+	# attribute columns of each dimension table, in the order models supply values
+	DIMENSIONS = {
+		'quad': ('name', 'start_date', 'end_date', 'duration'),
+		'deliverable': ('title', 'pillar'),
+		'sprint': ('name', 'start_date', 'end_date', 'duration', 'quad_id'),
+		'epic': ('title',),
+		'issue': ('title', 'type', 'opened_date', 'closed_date', 'parent_issue_guid', 'epic_id'),
+	}
+
+	# entity column and value columns of each fact table
+	FACTS = {
+		'deliverable_quad_map': ('deliverable_id', ('quad_id',)),
+		'epic_deliverable_map': ('epic_id', ('deliverable_id',)),
+		'issue_history': ('issue_id', ('status', 'is_closed', 'points')),
+		'issue_sprint_map': ('issue_id', ('sprint_id',)),
+	}
+
+	def __init__(self, dbh):
+		self._dbh = dbh
+		self._rows = {}
+
+
+	""" public methods """
+
+
+	def load(self) -> None:
+
+		# tables already loaded are kept consistent by put() and putFact(), so they are not rescanned
+		for table in list(self.DIMENSIONS) + list(self.FACTS):
+			if not self.isLoaded(table):
+				self.loadTable(table)
+
+
+	def loadTable(self, table: str) -> None:
+
+		# dimension: map guid to (id, row hash)
+		if table in self.DIMENSIONS:
+			sql = "select guid, id, row_hash from {}".format(table)
+
+		# fact: map entity id to (latest effective date, row hash)
+		else:
+			entity_column = self.FACTS[table][0]
+			sql = "select {c}, max(d_effective), row_hash from {t} group by {c}".format(c=entity_column, t=table)
+
+		rows = {}
+		cursor = self._dbh.cursor()
+		for key, value1, value2 in cursor.execute(sql):
+			rows[key] = (value1, value2)
+		cursor.close()
+
+		self._rows[table] = rows
+
+
+	def isLoaded(self, table: str) -> bool:
+
+		return table in self._rows
+
+
+	def columns(self, table: str) -> tuple:
+
+		if table in self.DIMENSIONS:
+			return self.DIMENSIONS[table]
+
+		return self.FACTS[table][1]
+
+
+	def entityColumn(self, table: str) -> str:
+
+		return self.FACTS[table][0]
+
+
+	def get(self, table: str, guid: str) -> (int, str):
+
+		return self._rows[table].get(guid, (None, None))
+
+
+	def changeType(self, table: str, guid: str, row_hash: str) -> (int, DeliveryMetricsChangeType):
+
+		row_id, old_hash = self.get(table, guid)
+
+		if row_id is None:
+			return None, DeliveryMetricsChangeType.INSERT
+
+		if row_hash != old_hash:
+			return row_id, DeliveryMetricsChangeType.UPDATE
+
+		return row_id, DeliveryMetricsChangeType.NONE
+
+
+	def put(self, table: str, guid: str, row_id: int, row_hash: str) -> None:
+
+		self._rows[table][guid] = (row_id, row_hash)
+
+
+	def isFactChanged(self, table: str, entity_id: int, effective: str, row_hash: str) -> bool:
+
+		# a fact can be skipped only if the latest stored state is identical and not newer than the effective date
+		latest_effective, latest_hash = self.get(table, entity_id)
+
+		if latest_effective is None or latest_effective > effective:
+			return True
+
+		return row_hash != latest_hash
+
+
+	def putFact(self, table: str, entity_id: int, effective: str, row_hash: str) -> None:
+
+		latest_effective, latest_hash = self.get(table, entity_id)
+
+		if latest_effective is None or latest_effective <= effective:
+			self._rows[table][entity_id] = (effective, row_hash)
+
+
+	def size(self) -> int:
+
+		return sum(len(self._rows.get(table, {})) for table in self.DIMENSIONS)
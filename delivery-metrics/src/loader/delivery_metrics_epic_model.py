@@ -9,20 +9,11 @@ class DeliveryMetricsEpicModel(DeliveryMetricsModel):
 		if not isinstance(epic, dict):
 			return None, DeliveryMetricsChangeType.NONE
 
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
 		# get cursor to keep open across transactions
 		cursor = self.cursor()
 
-		# insert dimensions
-		epic_id = self._insertDimensions(cursor, epic)
-		if epic_id is not None:
-			change_type = DeliveryMetricsChangeType.INSERT
-
-		# if insert failed, select and update
-		if epic_id is None:
-			epic_id, change_type = self._updateDimensions(cursor, epic)
+		# insert or update dimensions as decided by the dimension cache
+		epic_id, change_type = self.syncDimension(cursor, 'epic', epic)
 
 		# insert facts
 		if epic_id is not None:
@@ -34,20 +25,44 @@ class DeliveryMetricsEpicModel(DeliveryMetricsModel):
 		return epic_id, change_type
 
 
-	def _insertDimensions(self, cursor, epic: dict) -> int:
+	def syncEpics(self, epics: list) -> (dict, int, int):
 
-		# get values needed for sql statement
-		guid = epic.get('guid')
-		title = epic.get('title')
-		deliverable_id = epic.get('deliverable_id')
-		effective = self.getEffectiveDate()
+		# get cursor to keep open across transactions
+		cursor = self.cursor()
+
+		# insert or update changed dimensions in bulk
+		guid_map, insert_count, update_count = self.syncDimensions(cursor, 'epic', epics)
+
+		# keep only facts that changed since the latest stored state
+		facts = []
+		for epic in epics:
+			epic_id = guid_map.get(epic.get('guid')) if isinstance(epic, dict) else None
+			if epic_id is not None:
+				facts.append((epic_id, (epic.get('deliverable_id'),)))
+		rows = self.changedFacts('epic_deliverable_map', facts)
+
+		# stage and upsert facts: epic_deliverable_map
+		if len(rows) > 0:
+			self.stageRows(cursor, "stage_epic_deliverable_map", "epic_id integer, deliverable_id integer, row_hash text", rows)
+			fact_sql = '''
+				insert into epic_deliverable_map (epic_id, deliverable_id, row_hash, d_effective)
+				select epic_id, deliverable_id, row_hash, ? from stage_epic_deliverable_map where true
+				on conflict(epic_id, d_effective) do update set (deliverable_id, row_hash, t_modified) = (excluded.deliverable_id, excluded.row_hash, current_timestamp)
+			'''
+			cursor.execute(fact_sql, (self.getEffectiveDate(),))
+			self.upsertCurrentFacts(cursor, 'epic_deliverable_map', rows)
+
+		# close cursor
+		cursor.close()
+
+		return guid_map, insert_count, update_count
 
-		# insert into dimension table: epic
-		insert_sql = "insert into epic(guid, title) values (?, ?) on conflict(guid) do nothing returning id"
-		insert_data = (guid, title)
-		epic_id = self.insertWithCursor(cursor, insert_sql, insert_data)
 
-		return epic_id
+	def dimensionValues(self, epic: dict) -> tuple:
+
+		return (
+			epic.get('title'),
+		)
 	
 
 	def _insertFacts(self, cursor, epic_id: int, epic: dict) -> int:
@@ -56,36 +71,16 @@ class DeliveryMetricsEpicModel(DeliveryMetricsModel):
 		deliverable_id = epic.get('deliverable_id')
 		effective = self.getEffectiveDate()
 
+		# skip fact if unchanged since the latest stored state
+		row_hash = self.factHashIfChanged('epic_deliverable_map', epic_id, (deliverable_id,))
+		if row_hash is None:
+			return None
+
 		# insert into fact table: epic_deliverable_map
-		insert_sql = "insert into epic_deliverable_map(epic_id, deliverable_id, d_effective) values (?, ?, ?) on conflict(epic_id, d_effective) do update set (deliverable_id, t_modified) = (?, current_timestamp) returning id"
-		insert_data = (epic_id, deliverable_id, effective, deliverable_id)
+		insert_sql = "insert into epic_deliverable_map(epic_id, deliverable_id, row_hash, d_effective) values (?, ?, ?, ?) on conflict(epic_id, d_effective) do update set (deliverable_id, row_hash, t_modified) = (?, ?, current_timestamp) returning id"
+		insert_data = (epic_id, deliverable_id, row_hash, effective, deliverable_id, row_hash)
 		map_id = self.insertWithCursor(cursor, insert_sql, insert_data)
+		self.upsertCurrentFacts(cursor, 'epic_deliverable_map', [(epic_id, deliverable_id, row_hash)])
+		self.putFact('epic_deliverable_map', epic_id, row_hash)
 
 		return map_id 
-
-
-	def _updateDimensions(self, cursor, epic: dict) -> (int, DeliveryMetricsChangeType):
-
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
-		# get values needed for sql statement
-		guid = epic.get('guid')
-		new_title = epic.get('title')
-
-		# select
-		select_sql = "select id, title from epic where guid = ?"
-		select_data = (guid,)
-		cursor.execute(select_sql, select_data)
-		epic_id, old_title = cursor.fetchone()
-
-		# compare
-		if epic_id is not None:
-			if ((new_title, ) != (old_title, )):
-				change_type = DeliveryMetricsChangeType.UPDATE
-				sql_update = "update epic set title = ?, t_modified = current_timestamp where id = ?"
-				data_update = (new_title, epic_id)
-				cursor.execute(sql_update, data_update)
-
-		return epic_id, change_type
-
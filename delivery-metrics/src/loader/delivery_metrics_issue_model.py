@@ -9,20 +9,11 @@ class DeliveryMetricsIssueModel(DeliveryMetricsModel):
 		if not isinstance(issue, dict):
 			return None, DeliveryMetricsChangeType.NONE
 
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
 		# get cursor to keep open across transactions
 		cursor = self.cursor()
 
-		# insert dimensions
-		issue_id = self._insertDimensions(cursor, issue)
-		if issue_id is not None:
-			change_type = DeliveryMetricsChangeType.INSERT
-
-		# if insert failed, select and update
-		if issue_id is None:
-			issue_id, change_type = self._updateDimensions(cursor, issue)
+		# insert or update dimensions as decided by the dimension cache
+		issue_id, change_type = self.syncDimension(cursor, 'issue', issue)
 
 		# insert facts
 		if issue_id is not None:
@@ -34,23 +25,64 @@ class DeliveryMetricsIssueModel(DeliveryMetricsModel):
 		return issue_id, change_type
 
 
-	def _insertDimensions(self, cursor, issue: dict) -> int:
+	def syncIssues(self, issues: list) -> (dict, int, int):
 
-		# get values needed for sql statement
-		guid = issue.get('guid')
-		title = issue.get('title')
-		t = issue.get('type')
-		opened_date = self.formatDate(issue.get('opened_date'))
-		closed_date = self.formatDate(issue.get('closed_date'))
-		parent_guid = issue.get('parent_guid')
-		epic_id = issue.get('epic_id')
+		# get cursor to keep open across transactions
+		cursor = self.cursor()
+
+		# insert or update changed dimensions in bulk
+		guid_map, insert_count, update_count = self.syncDimensions(cursor, 'issue', issues)
+
+		# keep only facts that changed since the latest stored state
+		history_facts = []
+		sprint_facts = []
+		for issue in issues:
+			issue_id = guid_map.get(issue.get('guid')) if isinstance(issue, dict) else None
+			if issue_id is not None:
+				history_facts.append((issue_id, (issue.get('status'), issue.get('is_closed'), issue.get('points') or 0)))
+				sprint_facts.append((issue_id, (issue.get('sprint_id'),)))
+		history_rows = self.changedFacts('issue_history', history_facts)
+		sprint_rows = self.changedFacts('issue_sprint_map', sprint_facts)
+		effective = self.getEffectiveDate()
+
+		# stage and upsert facts: issue_history
+		if len(history_rows) > 0:
+			self.stageRows(cursor, "stage_issue_history", "issue_id integer, status text, is_closed integer, points integer, row_hash text", history_rows)
+			fact_sql1 = '''
+				insert into issue_history (issue_id, status, is_closed, points, row_hash, d_effective)
+				select issue_id, status, is_closed, points, row_hash, ? from stage_issue_history where true
+				on conflict(issue_id, d_effective) do update set (status, is_closed, points, row_hash, t_modified) = (excluded.status, excluded.is_closed, excluded.points, excluded.row_hash, current_timestamp)
+			'''
+			cursor.execute(fact_sql1, (effective,))
+			self.upsertCurrentFacts(cursor, 'issue_history', history_rows)
+
+		# stage and upsert facts: issue_sprint_map
+		if len(sprint_rows) > 0:
+			self.stageRows(cursor, "stage_issue_sprint_map", "issue_id integer, sprint_id integer, row_hash text", sprint_rows)
+			fact_sql2 = '''
+				insert into issue_sprint_map (issue_id, sprint_id, row_hash, d_effective)
+				select issue_id, sprint_id, row_hash, ? from stage_issue_sprint_map where true
+				on conflict(issue_id, d_effective) do update set (sprint_id, row_hash, t_modified) = (excluded.sprint_id, excluded.row_hash, current_timestamp)
+			'''
+			cursor.execute(fact_sql2, (effective,))
+			self.upsertCurrentFacts(cursor, 'issue_sprint_map', sprint_rows)
+
+		# close cursor
+		cursor.close()
 
-		# insert into dimension table: issue
-		insert_sql = "insert into issue (guid, title, type, opened_date, closed_date, parent_issue_guid, epic_id) values (?, ?, ?, ?, ?, ?, ?) on conflict(guid) do nothing returning id"
-		insert_data = (guid, title, t, opened_date, closed_date, parent_guid, epic_id)
-		issue_id = self.insertWithCursor(cursor, insert_sql, insert_data)
+		return guid_map, insert_count, update_count
 
-		return issue_id
+
+	def dimensionValues(self, issue: dict) -> tuple:
+
+		return (
+			issue.get('title'),
+			issue.get('type'),
+			self.formatDate(issue.get('opened_date')),
+			self.formatDate(issue.get('closed_date')),
+			issue.get('parent_guid'),
+			issue.get('epic_id')
+		)
 
 
 	def _insertFacts(self, cursor, issue_id: int, issue: dict) -> (int, int):
@@ -62,48 +94,24 @@ class DeliveryMetricsIssueModel(DeliveryMetricsModel):
 		sprint_id = issue.get('sprint_id')
 		effective = self.getEffectiveDate()
 
-		# insert into fact table: issue_history
-		insert_sql1 = "insert into issue_history (issue_id, status, is_closed, points, d_effective) values (?, ?, ?, ?, ?) on conflict (issue_id, d_effective) do update set (status, is_closed, points, t_modified) = (?, ?, ?, current_timestamp) returning id" 
-		insert_data1 = (issue_id, status, is_closed, points, effective, status, is_closed, points) 
-		history_id = self.insertWithCursor(cursor, insert_sql1, insert_data1)
-
-		# insert into fact table: issue_sprint_map
-		insert_sql2 = "insert into issue_sprint_map (issue_id, sprint_id, d_effective) values (?, ?, ?) on conflict (issue_id, d_effective) do update set (sprint_id, t_modified) = (?, current_timestamp) returning id"
-		insert_data2 = (issue_id, sprint_id, effective, sprint_id) 
-		map_id = self.insertWithCursor(cursor, insert_sql2, insert_data2)
+		# insert into fact table: issue_history, unless unchanged since the latest stored state
+		history_id = None
+		history_hash = self.factHashIfChanged('issue_history', issue_id, (status, is_closed, points))
+		if history_hash is not None:
+			insert_sql1 = "insert into issue_history (issue_id, status, is_closed, points, row_hash, d_effective) values (?, ?, ?, ?, ?, ?) on conflict (issue_id, d_effective) do update set (status, is_closed, points, row_hash, t_modified) = (?, ?, ?, ?, current_timestamp) returning id" 
+			insert_data1 = (issue_id, status, is_closed, points, history_hash, effective, status, is_closed, points, history_hash) 
+			history_id = self.insertWithCursor(cursor, insert_sql1, insert_data1)
+			self.upsertCurrentFacts(cursor, 'issue_history', [(issue_id, status, is_closed, points, history_hash)])
+			self.putFact('issue_history', issue_id, history_hash)
+
+		# insert into fact table: issue_sprint_map, unless unchanged since the latest stored state
+		map_id = None
+		map_hash = self.factHashIfChanged('issue_sprint_map', issue_id, (sprint_id,))
+		if map_hash is not None:
+			insert_sql2 = "insert into issue_sprint_map (issue_id, sprint_id, row_hash, d_effective) values (?, ?, ?, ?) on conflict (issue_id, d_effective) do update set (sprint_id, row_hash, t_modified) = (?, ?, current_timestamp) returning id"
+			insert_data2 = (issue_id, sprint_id, map_hash, effective, sprint_id, map_hash) 
+			map_id = self.insertWithCursor(cursor, insert_sql2, insert_data2)
+			self.upsertCurrentFacts(cursor, 'issue_sprint_map', [(issue_id, sprint_id, map_hash)])
+			self.putFact('issue_sprint_map', issue_id, map_hash)
 
 		return history_id, map_id
-
-
-	def _updateDimensions(self, cursor, issue: dict) -> (int, DeliveryMetricsChangeType):
-
-		# initialize return value
-		change_type = DeliveryMetricsChangeType.NONE
-
-		# get values needed for sql statement
-		guid = issue.get('guid')
-		new_title = issue.get('title')
-		new_type = issue.get('type')
-		new_opened = self.formatDate(issue.get('opened_date'))
-		new_closed = self.formatDate(issue.get('closed_date'))
-		new_parent = issue.get('parent_guid')
-		new_epic_id = issue.get('epic_id')
-		new_values = (new_title, new_type, new_opened, new_closed, new_parent, new_epic_id)
-
-		# select
-		select_sql = "select id, title, type, opened_date, closed_date, parent_issue_guid, epic_id from issue where guid = ?"
-		select_data = (guid,)
-		cursor.execute(select_sql, select_data)
-		issue_id, old_title, old_type, old_opened, old_closed, old_parent, old_epic_id = cursor.fetchone()
-		old_values = (old_title, old_type, old_opened, old_closed, old_parent, old_epic_id)
-
-		# compare
-		if issue_id is not None:
-			if (new_values != old_values):
-				change_type = DeliveryMetricsChangeType.UPDATE
-				update_sql = "update issue set title = ?, type = ?, opened_date = ?, closed_date = ?, parent_issue_guid = ?, epic_id = ?, t_modified = current_timestamp where id = ?"
-				update_data = new_values + (issue_id,)	
-				cursor.execute(update_sql, update_data)
-
-		return issue_id, change_type
-
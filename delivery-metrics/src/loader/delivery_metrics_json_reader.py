@@ -0,0 +1,116 @@
+import json
+from typing import Iterator, TextIO
+
+class DeliveryMetricsJsonReader:
+
+	def __init__(self, file_handle: TextIO, chunk_size: int = 65536):
+		self._file = file_handle
+		self._chunk_size = chunk_size
+		self._decoder = json.JSONDecoder()
+		self._buffer = ""
+		self._pos = 0
+		self._eof = False
+
+
+	""" public methods """
+
+
+	def items(self) -> Iterator:
+
+		# detect input format from first significant character
+		c = self._skipWhitespace()
+		if c is None:
+			return
+
+		# top-level array: yield one element at a time
+		if c == '[':
+			self._pos += 1
+			yield from self._readArray()
+			return
+
+		# otherwise treat input as json lines (one value per line)
+		yield from self._readLines()
+
+
+	""" private methods """
+
+
+	def _readArray(self) -> Iterator:
+
+		# handle empty array
+		if self._skipWhitespace() == ']':
+			self._pos += 1
+			return
+
+		while True:
+
+			# decode next element
+			yield self._decodeValue()
+
+			# expect a separator or the end of the array
+			c = self._skipWhitespace()
+			if c == ',':
+				self._pos += 1
+			elif c == ']':
+				self._pos += 1
+				return
+			else:
+				raise json.JSONDecodeError("expecting ',' or ']'", self._buffer, self._pos)
+
+
+	def _readLines(self) -> Iterator:
+
+		while self._skipWhitespace() is not None:
+			yield self._decodeValue()
+
+
+	def _decodeValue(self):
+
+		self._skipWhitespace()
+		while True:
+			try:
+				value, end = self._decoder.raw_decode(self._buffer, self._pos)
+				# a value ending exactly at the buffer boundary may be truncated, so read more first
+				if end < len(self._buffer) or self._eof:
+					self._pos = end
+					self._compact()
+					return value
+			except json.JSONDecodeError:
+				if self._eof:
+					raise
+
+			# value is incomplete; read next chunk and retry
+			self._fill()
+
+
+	def _skipWhitespace(self) -> str:
+
+		while True:
+			while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+				self._pos += 1
+			if self._pos < len(self._buffer):
+				return self._buffer[self._pos]
+			if not self._fill():
+				return None
+
+
+	def _fill(self) -> bool:
+
+		if self._eof:
+			return False
+
+		chunk = self._file.read(self._chunk_size)
+		if not chunk:
+			self._eof = True
+			return False
+
+		self._buffer += chunk
+		return True
+
+
+	def _compact(self) -> None:
+
+		# drop consumed text so the buffer only holds the current item
+		if self._pos > self._chunk_size:
+			self._buffer = self._buffer[self._pos:]
+			self._pos = 0
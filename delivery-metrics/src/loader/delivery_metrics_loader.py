@@ -1,21 +1,35 @@
 import json
+import sqlite3
 import sys
 from delivery_metrics_config import DeliveryMetricsConfig
 from delivery_metrics_database import DeliveryMetricsDatabase
 from delivery_metrics_deliverable_model import DeliveryMetricsDeliverableModel
+from delivery_metrics_dimension_cache import DeliveryMetricsDimensionCache
 from delivery_metrics_epic_model import DeliveryMetricsEpicModel
 from delivery_metrics_issue_model import DeliveryMetricsIssueModel
-from delivery_metrics_model import DeliveryMetricsChangeType
+from delivery_metrics_json_reader import DeliveryMetricsJsonReader
+from delivery_metrics_run_metrics import DeliveryMetricsRunMetrics
+from delivery_metrics_snapshot_digest import DeliveryMetricsSnapshotDigest
 from delivery_metrics_sprint_model import DeliveryMetricsSprintModel
 from delivery_metrics_quad_model import DeliveryMetricsQuadModel
-from typing import TextIO
+from delivery_metrics_rollup import DeliveryMetricsRollup
+from delivery_metrics_schema import DeliveryMetricsSchema
+from typing import Iterable, Iterator, TextIO
 
 
 class DeliveryMetricsDataLoader:
 
-	def __init__(self, config: DeliveryMetricsConfig, file_path: str):
+	def __init__(self, config: DeliveryMetricsConfig, file_path: str, incremental: bool = False, trace_callback=None):
 		self.config = config
 		self.file_path = file_path
+		self.incremental = incremental
+		self.trace_callback = trace_callback
+		self.db = DeliveryMetricsDatabase(config)
+		self.cache = DeliveryMetricsDimensionCache(self.db)
+		self.digest = None
+		self.metrics = DeliveryMetricsRunMetrics()
+		self.items = None
+		self.file_handle = None
 		self.data = None
 		self.unique_quads = {}
 		self.unique_deliverables = {}
@@ -28,21 +42,55 @@ class DeliveryMetricsDataLoader:
 
 
 	def loadData(self) -> None:
-		# read file
+
+		# collect per-phase timings and sql statement counts for this run
+		self.metrics = DeliveryMetricsRunMetrics()
+		self.metrics.info = {
+			'file': self.file_path,
+			'effective_date': self.config.effectiveDate(),
+			'profile': self.config.profile(),
+			'incremental': self.incremental
+		}
+		self.db.setTraceCallback(self._traceStatement)
+
+		# run the whole load in a single transaction
 		try:
-			print("opening file '{}'".format(self.file_path))
-			with open(self.file_path, 'r') as f:
-				self._readFile(f)
-				f.close()
-		except IOError:
-			print("Fatal error: unable to read file: {}".format(self.file_path))
+			with self.db.transaction():
+				DeliveryMetricsSchema(self.db).migrate()
+				self._loadData()
+		except sqlite3.Error as error:
+			print("FATAL: unable to load data: {}".format(error))
 			sys.exit()
 
-		# parse data
-		self._parseData()
 
-		# write to database
-		self._persistData()
+	def loadItems(self, items: Iterable, source: str) -> None:
+
+		# load items produced in process, e.g. by the export transformation, instead of reading a file;
+		# items are consumed as they are parsed, and source is reported in place of the file path
+		self.items = items
+		self.file_path = source
+		try:
+			self.loadData()
+		finally:
+			self.items = None
+
+
+	def loadFile(self, file_handle: TextIO, source: str) -> None:
+
+		# load items from a file handle opened by the caller, e.g. stdin, which is read as a stream and not closed;
+		# source is reported in place of the file path
+		self.file_handle = file_handle
+		self.file_path = source
+		try:
+			self.loadData()
+		finally:
+			self.file_handle = None
+
+
+	def setFilePath(self, file_path: str) -> None:
+
+		# reusing a loader for another file keeps its connection, dimension cache and snapshot digest
+		self.file_path = file_path
 
 
 	def removePrefixFromGuid(self, guid: str) -> str:
@@ -58,9 +106,82 @@ class DeliveryMetricsDataLoader:
 	""" private methods """
 
 
+	def _traceStatement(self, statement: str) -> None:
+
+		# count every statement for run metrics and pass it on to the caller's trace callback, if any
+		self.metrics.traceStatement(statement)
+		if self.trace_callback is not None:
+			self.trace_callback(statement)
+
+
+	def _loadData(self) -> None:
+
+		# load digest of previously loaded snapshot, unless kept from a prior load on this connection
+		if self.digest is None:
+			self.digest = DeliveryMetricsSnapshotDigest(self.db)
+			self.digest.load()
+		self.digest.begin()
+		if self.incremental and not self.digest.isCurrent():
+			print("WARNING: effective date is older than last loaded snapshot; loading all items")
+
+		# read items (from file, unless given in process) and parse them as they are streamed
+		if self.items is not None:
+			print("reading items from {}".format(self.file_path))
+			self._readData(iter(self.items))
+			with self.metrics.phase('parse'):
+				self._parseData()
+		elif self.file_handle is not None:
+			print("reading items from {}".format(self.file_path))
+			self._readFile(self.file_handle)
+			with self.metrics.phase('parse'):
+				self._parseData()
+		else:
+			try:
+				print("opening file '{}'".format(self.file_path))
+				with open(self.file_path, 'r') as f:
+					self._readFile(f)
+					with self.metrics.phase('parse'):
+						self._parseData()
+					f.close()
+			except IOError:
+				print("Fatal error: unable to read file: {}".format(self.file_path))
+				sys.exit()
+
+		# items are read lazily while parsing, so report parse time net of read time
+		self.metrics.addTime('parse', -self.metrics.phases.get('read', 0.0))
+
+		# write to database
+		self._persistData()
+
+		# remember digest of this snapshot for the next incremental load
+		if self.digest.isCurrent():
+			with self.metrics.phase('digest'), self.db.savepoint('digest'):
+				self.digest.save()
+			for change, count in self.digest.counts.items():
+				print("snapshot item(s) {}: {}".format(change, count))
+
+		# invalidate cached metrics results computed from earlier data
+		self._bumpDataVersion()
+
+
 	def _readFile(self, file_handle: TextIO) -> None:
+		self._readData(self._readItems(file_handle))
+
+
+	def _readData(self, items: Iterator) -> None:
+		self.data = items
+
+		# diff items against previous snapshot; in incremental mode only added and changed items are parsed
+		if self.digest is not None and self.digest.isCurrent():
+			self.data = self.digest.filterItems(self.data, skip_unchanged=self.incremental)
+
+		# time spent reading (and diffing) items
+		self.data = self.metrics.timeIterator('read', self.data)
+
+
+	def _readItems(self, file_handle: TextIO) -> Iterator:
 		try:
-			self.data = json.load(file_handle)
+			yield from DeliveryMetricsJsonReader(file_handle).items()
 		except json.JSONDecodeError:
 			print("FATAL: unable to read json")
 			sys.exit()
@@ -75,10 +196,12 @@ class DeliveryMetricsDataLoader:
 		self.unique_issues = {}
 
 		print("parsing json")
-		print("found {} items to process".format(str(len(self.data))))
+		item_count = 0
 
 		for item in self.data:
 
+			item_count += 1
+
 			# validate
 			if not isinstance(item, dict):
 				continue 
@@ -97,6 +220,9 @@ class DeliveryMetricsDataLoader:
 				self.unique_issues[issue_guid]['sprint_guid'] = sprint_guid
 				self.unique_issues[issue_guid]['epic_guid'] = epic_guid
 
+		print("found {} items to process".format(str(item_count)))
+		self.metrics.addRows('read', item_count)
+		self.metrics.addRows('parse', item_count)
 		self.data = None
 
 
@@ -233,152 +359,94 @@ class DeliveryMetricsDataLoader:
 	def _persistData(self):
 
 		# initialize models
-		db = DeliveryMetricsDatabase(self.config)
-		deliverableModel = DeliveryMetricsDeliverableModel(db)
-		epicModel = DeliveryMetricsEpicModel(db)
-		issueModel = DeliveryMetricsIssueModel(db)
-		sprintModel = DeliveryMetricsSprintModel(db)
-		quadModel = DeliveryMetricsQuadModel(db)
-
-		# initialize maps
-		quad_guid_map = {}
-		deliverable_guid_map = {}
-		sprint_guid_map = {}
-		epic_guid_map = {}
-
-		# initialize status counters
-		insert_count = {
-			'quads': 0,
-			'deliverables': 0,
-			'sprints': 0,
-			'epics': 0,
-			'issues': 0
-		}
-		update_count = dict(insert_count)
+		db = self.db
+		cache = self.cache
+		deliverableModel = DeliveryMetricsDeliverableModel(db, cache)
+		epicModel = DeliveryMetricsEpicModel(db, cache)
+		issueModel = DeliveryMetricsIssueModel(db, cache)
+		sprintModel = DeliveryMetricsSprintModel(db, cache)
+		quadModel = DeliveryMetricsQuadModel(db, cache)
+
+		# preload guid-to-id dimension cache with one scan per table
+		with self.metrics.phase('cache'):
+			cache.load()
+		print("cached {} dimension row(s)".format(cache.size()))
 
 		print("persisting data")
 
-		# for each quad
-		for guid, quad in self.unique_quads.items():
-
-			# write to db
-			quad_id, change_type = quadModel.syncQuad(quad)
-
-			# save mapping of guid to db row id
-			if quad_id is not None:
-				quad_guid_map[guid] = quad_id
-
-			# save change type for reporting purposes
-			if change_type == DeliveryMetricsChangeType.INSERT:
-				insert_count['quads'] += 1
-			elif change_type == DeliveryMetricsChangeType.UPDATE:
-				update_count['quads'] += 1
-
-		# summarize results of quad inserts/updates
-		print("quad row(s) inserted: {}".format(insert_count['quads']))
-		print("quad row(s) updated: {}".format(update_count['quads']))
-
-		# for each deliverable 
-		for guid, deliverable in self.unique_deliverables.items():
+		# write quads to db in bulk
+		quads = list(self.unique_quads.values())
+		self.metrics.addRows('persist_quad', len(quads))
+		with self.metrics.phase('persist_quad'), db.savepoint('quads'):
+			quad_guid_map, inserted, updated = quadModel.syncQuads(quads)
+		self._printSyncResults('quad', inserted, updated, len(quads))
 
+		# convert guids to ids and write deliverables to db in bulk
+		deliverables = []
+		for deliverable in self.unique_deliverables.values():
 			new_deliverable = dict(deliverable)
-
-			# convert guids to ids
-			quad_guid = deliverable.get('quad_guid')
-			new_deliverable['quad_id'] = quad_guid_map.get(quad_guid)
-
-			# write to db
-			deliverable_id, change_type = deliverableModel.syncDeliverable(new_deliverable)
-
-			# save mapping of guid to db row id
-			if deliverable_id is not None:
-				deliverable_guid_map[guid] = deliverable_id
-
-			# save change type for reporting purposes
-			if change_type == DeliveryMetricsChangeType.INSERT:
-				insert_count['deliverables'] += 1
-			elif change_type == DeliveryMetricsChangeType.UPDATE:
-				update_count['deliverables'] += 1
-
-		# summarize results of deliverable inserts/updates
-		print("deliverable row(s) inserted: {}".format(insert_count['deliverables']))
-		print("deliverable row(s) updated: {}".format(update_count['deliverables']))
-
-		# for each sprint 
-		for guid, sprint in self.unique_sprints.items():
-
+			new_deliverable['quad_id'] = quad_guid_map.get(deliverable.get('quad_guid'))
+			deliverables.append(new_deliverable)
+		self.metrics.addRows('persist_deliverable', len(deliverables))
+		with self.metrics.phase('persist_deliverable'), db.savepoint('deliverables'):
+			deliverable_guid_map, inserted, updated = deliverableModel.syncDeliverables(deliverables)
+		self._printSyncResults('deliverable', inserted, updated, len(deliverables))
+
+		# convert guids to ids and write sprints to db in bulk
+		sprints = []
+		for sprint in self.unique_sprints.values():
 			new_sprint = dict(sprint)
-
-			# convert guids to ids
-			quad_guid = sprint.get('quad_guid')
-			new_sprint['quad_id'] = quad_guid_map.get(quad_guid)
-
-			# write to db
-			sprint_id, change_type = sprintModel.syncSprint(new_sprint)
-
-			# save mapping of guid to db row id
-			if sprint_id is not None:
-				sprint_guid_map[guid] = sprint_id
-
-			# save change type for reporting purposes
-			if change_type == DeliveryMetricsChangeType.INSERT:
-				insert_count['sprints'] += 1
-			elif change_type == DeliveryMetricsChangeType.UPDATE:
-				update_count['sprints'] += 1
-
-		# summarize results of sprint inserts/updates
-		print("sprint row(s) inserted: {}".format(insert_count['sprints']))
-		print("sprint row(s) updated: {}".format(update_count['sprints']))
-
-		# for each epic 
-		for guid, epic in self.unique_epics.items():
-
+			new_sprint['quad_id'] = quad_guid_map.get(sprint.get('quad_guid'))
+			sprints.append(new_sprint)
+		self.metrics.addRows('persist_sprint', len(sprints))
+		with self.metrics.phase('persist_sprint'), db.savepoint('sprints'):
+			sprint_guid_map, inserted, updated = sprintModel.syncSprints(sprints)
+		self._printSyncResults('sprint', inserted, updated, len(sprints))
+
+		# convert guids to ids and write epics to db in bulk
+		epics = []
+		for epic in self.unique_epics.values():
 			new_epic = dict(epic)
-
-			# convert guids to ids
-			deliverable_guid = epic.get('deliverable_guid')
-			new_epic['deliverable_id'] = deliverable_guid_map.get(deliverable_guid)
-
-			# write to db
-			epic_id, change_type = epicModel.syncEpic(new_epic)
-
-			# save mapping of guid to db row id
-			if epic_id is not None:
-				epic_guid_map[guid] = epic_id
-
-			# save change type for reporting purposes
-			if change_type == DeliveryMetricsChangeType.INSERT:
-				insert_count['epics'] += 1
-			elif change_type == DeliveryMetricsChangeType.UPDATE:
-				update_count['epics'] += 1
-
-		# summarize results of epic inserts/updates
-		print("epic row(s) inserted: {}".format(insert_count['epics']))
-		print("epic row(s) updated: {}".format(update_count['epics']))
-
-		# for each issue 
-		for guid, issue in self.unique_issues.items():
-
+			new_epic['deliverable_id'] = deliverable_guid_map.get(epic.get('deliverable_guid'))
+			epics.append(new_epic)
+		self.metrics.addRows('persist_epic', len(epics))
+		with self.metrics.phase('persist_epic'), db.savepoint('epics'):
+			epic_guid_map, inserted, updated = epicModel.syncEpics(epics)
+		self._printSyncResults('epic', inserted, updated, len(epics))
+
+		# convert guids to ids and write issues to db in bulk
+		issues = []
+		for issue in self.unique_issues.values():
 			new_issue = dict(issue)
-
-			# convert guids to ids
-			epic_guid = issue.get('epic_guid')
-			sprint_guid = issue.get('sprint_guid')
-			new_issue['epic_id'] = epic_guid_map.get(epic_guid)
-			new_issue['sprint_id'] = sprint_guid_map.get(sprint_guid)
+			new_issue['epic_id'] = epic_guid_map.get(issue.get('epic_guid'))
+			new_issue['sprint_id'] = sprint_guid_map.get(issue.get('sprint_guid'))
 			del new_issue['epic_guid']
 			del new_issue['sprint_guid']
+			issues.append(new_issue)
+		self.metrics.addRows('persist_issue', len(issues))
+		with self.metrics.phase('persist_issue'), db.savepoint('issues'):
+			issue_guid_map, inserted, updated = issueModel.syncIssues(issues)
+		self._printSyncResults('issue', inserted, updated, len(issues))
+
+		# apply changes of issue facts and epic mappings to daily rollups
+		rollup = DeliveryMetricsRollup(db)
+		with self.metrics.phase('rollup'), db.savepoint('rollups'):
+			rollup.applyChanges(sorted(issueModel.changed_ids), sorted(epicModel.changed_ids))
+		self.metrics.addRows('rollup', rollup.counts['issues'])
+		print("rollup row(s) written: {} epic, {} deliverable".format(rollup.counts['epic_rows'], rollup.counts['deliverable_rows']))
+
+
+	def _bumpDataVersion(self) -> None:
 
-			# write to db
-			issue_id, change_type = issueModel.syncIssue(new_issue)
+		cursor = self.db.cursor()
+		version = cursor.execute("update data_version set (version, t_modified) = (version + 1, current_timestamp) where id = 1 returning version").fetchone()
+		cursor.close()
+		print("data version: {}".format(version[0] if version is not None else None))
 
-			# save change type for reporting purposes
-			if change_type == DeliveryMetricsChangeType.INSERT:
-				insert_count['issues'] += 1
-			elif change_type == DeliveryMetricsChangeType.UPDATE:
-				update_count['issues'] += 1
 
-		# summarize results of epic inserts/updates
-		print("issue row(s) inserted: {}".format(insert_count['issues']))
-		print("issue row(s) updated: {}".format(update_count['issues']))
+	def _printSyncResults(self, entity: str, inserted: int, updated: int, total: int) -> None:
 
+		# summarize results of inserts/updates
+		print("{} row(s) inserted: {}".format(entity, inserted))
+		print("{} row(s) updated: {}".format(entity, updated))
+		print("{} row(s) unchanged: {}".format(entity, total - inserted - updated))
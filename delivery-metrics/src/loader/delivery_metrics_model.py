@@ -1,9 +1,22 @@
+from abc import ABC, abstractmethod
 from enum import Enum
+import hashlib
+import json
+
+class DeliveryMetricsChangeType(Enum):
+	NONE = 0
+	INSERT = 1
+	UPDATE = 2
 
-class DeliveryMetricsModel:
 
-	def __init__(self, dbh):
+class DeliveryMetricsModel(ABC):
+
+	def __init__(self, dbh, cache=None):
 		self._dbh = dbh
+		self._cache = cache
+
+		# ids of entities whose dimension row or facts were written by this model
+		self.changed_ids = set()
 
 
 	def formatDate(self, date: str) -> str:
@@ -29,7 +42,6 @@ class DeliveryMetricsModel:
 		last_row_id_tuple = cursor.execute(sql, data).fetchone()
 		last_row_id = last_row_id_tuple[0] if isinstance(last_row_id_tuple, tuple) else None
 
-		self._dbh.commit()
 		cursor.close()
 
 		return last_row_id 
@@ -40,18 +52,191 @@ class DeliveryMetricsModel:
 		last_row_id_tuple = cursor.execute(sql, data).fetchone()
 		last_row_id = last_row_id_tuple[0] if isinstance(last_row_id_tuple, tuple) else None
 
-		self._dbh.commit()
-
 		return last_row_id 
+
+
+	def stageRows(self, cursor, table: str, columns: str, rows: list) -> None:
+
+		# (re)initialize temp table used to stage a set of rows for bulk sync
+		cursor.execute("create temp table if not exists {} ({})".format(table, columns))
+		cursor.execute("delete from {}".format(table))
+
+		# write rows to temp table
+		if len(rows) > 0:
+			placeholders = ", ".join(["?"] * len(rows[0]))
+			cursor.executemany("insert into {} values ({})".format(table, placeholders), rows)
+
+
+	def selectGuidMap(self, cursor, sql: str) -> dict:
+
+		# map guid to db row id
+		guid_map = {}
+		for guid, row_id in cursor.execute(sql):
+			guid_map[guid] = row_id
+
+		return guid_map
 		
 
-	def getEffectiveDate(self) -> str:
+	def dimensionCache(self, table: str):
 
-		return self._dbh.getEffectiveDate()
+		# create a private cache if none was shared with this model
+		if self._cache is None:
+			from delivery_metrics_dimension_cache import DeliveryMetricsDimensionCache
+			self._cache = DeliveryMetricsDimensionCache(self._dbh)
+
+		# scan the table on first use
+		if not self._cache.isLoaded(table):
+			self._cache.loadTable(table)
+
+		return self._cache
 
 
-class DeliveryMetricsChangeType(Enum):
-	NONE = 0
-	INSERT = 1
-	UPDATE = 2
-	
+	@abstractmethod
+	def dimensionValues(self, entity: dict) -> tuple:
+
+		# implemented by each model: attribute values in DeliveryMetricsDimensionCache column order
+		pass
+
+
+	def rowHash(self, values: tuple) -> str:
+
+		# compact content hash used to detect unchanged rows
+		content = json.dumps(values, separators=(',', ':'), default=str)
+		return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+
+
+	def syncDimension(self, cursor, table: str, entity: dict) -> (int, DeliveryMetricsChangeType):
+
+		# decide insert vs update vs no-op in memory
+		cache = self.dimensionCache(table)
+		columns = cache.columns(table) + ('row_hash',)
+		guid = entity.get('guid')
+		values = self.dimensionValues(entity)
+		row_hash = self.rowHash(values)
+		values = values + (row_hash,)
+		row_id, change_type = cache.changeType(table, guid, row_hash)
+
+		# insert into dimension table
+		if change_type == DeliveryMetricsChangeType.INSERT:
+			insert_sql = "insert into {} (guid, {}) values (?, {}) returning id".format(table, ", ".join(columns), ", ".join(["?"] * len(columns)))
+			row_id = self.insertWithCursor(cursor, insert_sql, (guid,) + values)
+
+		# update dimension table
+		elif change_type == DeliveryMetricsChangeType.UPDATE:
+			update_sql = "update {} set ({}, t_modified) = ({}, current_timestamp) where id = ?".format(table, ", ".join(columns), ", ".join(["?"] * len(columns)))
+			cursor.execute(update_sql, values + (row_id,))
+
+		# keep cache consistent with db
+		if change_type != DeliveryMetricsChangeType.NONE and row_id is not None:
+			cache.put(table, guid, row_id, row_hash)
+			self.changed_ids.add(row_id)
+
+		return row_id, change_type
+
+
+	def syncDimensions(self, cursor, table: str, entities: list) -> (dict, int, int):
+
+		# initialize return values
+		guid_map = {}
+		insert_count = 0
+		update_count = 0
+
+		# decide insert vs update vs no-op in memory; unchanged rows never touch the db
+		cache = self.dimensionCache(table)
+		columns = cache.columns(table) + ('row_hash',)
+		changed = {}
+		for entity in entities:
+			if not isinstance(entity, dict):
+				continue
+			guid = entity.get('guid')
+			values = self.dimensionValues(entity)
+			row_hash = self.rowHash(values)
+			row_id, change_type = cache.changeType(table, guid, row_hash)
+			if change_type == DeliveryMetricsChangeType.NONE:
+				guid_map[guid] = row_id
+				continue
+			if change_type == DeliveryMetricsChangeType.INSERT:
+				insert_count += 1
+			else:
+				update_count += 1
+			changed[guid] = (row_id, values + (row_hash,))
+
+		if len(changed) == 0:
+			return guid_map, insert_count, update_count
+
+		# stage changed rows in temp table
+		stage = "stage_{}".format(table)
+		stage_columns = "id integer, guid text primary key, {}".format(", ".join(columns))
+		rows = [(row_id, guid) + values for guid, (row_id, values) in changed.items()]
+		self.stageRows(cursor, stage, stage_columns, rows)
+
+		# update changed dimension rows by id
+		update_sql = "update {t} set ({c}, t_modified) = ({sc}, current_timestamp) from {s} s where s.id = {t}.id".format(
+			t=table, s=stage, c=", ".join(columns), sc=", ".join("s." + c for c in columns))
+		cursor.execute(update_sql)
+
+		# insert new dimension rows
+		insert_sql = "insert into {t} (guid, {c}) select guid, {c} from {s} where id is null order by rowid".format(
+			t=table, s=stage, c=", ".join(columns))
+		cursor.execute(insert_sql)
+
+		# map guids to db row ids and keep cache consistent with db
+		select_sql = "select s.guid, t.id from {s} s inner join {t} t on t.guid = s.guid".format(t=table, s=stage)
+		for guid, row_id in self.selectGuidMap(cursor, select_sql).items():
+			guid_map[guid] = row_id
+			cache.put(table, guid, row_id, changed[guid][1][-1])
+			self.changed_ids.add(row_id)
+
+		return guid_map, insert_count, update_count
+
+
+	def factHashIfChanged(self, table: str, entity_id: int, values: tuple) -> str:
+
+		# returns the hash of a fact that must be written for the effective date, or None if it is unchanged
+		row_hash = self.rowHash(values)
+		if self.dimensionCache(table).isFactChanged(table, entity_id, self.getEffectiveDate(), row_hash):
+			return row_hash
+
+		return None
+
+
+	def putFact(self, table: str, entity_id: int, row_hash: str) -> None:
+
+		self.changed_ids.add(entity_id)
+		self.dimensionCache(table).putFact(table, entity_id, self.getEffectiveDate(), row_hash)
+
+
+	def changedFacts(self, table: str, facts: list) -> list:
+
+		# keep only facts whose content differs from the latest stored state
+		rows = []
+		for entity_id, values in facts:
+			row_hash = self.factHashIfChanged(table, entity_id, values)
+			if row_hash is not None:
+				rows.append((entity_id,) + values + (row_hash,))
+				self.putFact(table, entity_id, row_hash)
+
+		return rows
+
+
+	def upsertCurrentFacts(self, cursor, table: str, rows: list) -> None:
+
+		# keep the latest row per entity in <table>_current, in the same transaction as the fact rows;
+		# rows are (entity_id,) + values + (row_hash,) as written to the fact table for the effective date
+		if len(rows) == 0:
+			return
+
+		cache = self.dimensionCache(table)
+		columns = (cache.entityColumn(table),) + cache.columns(table) + ('row_hash',)
+		update_columns = columns[1:]
+
+		# a fact for an older effective date (e.g. a backfill) never replaces a newer current row
+		upsert_sql = "insert into {t}_current ({c}, d_effective) values ({p}, ?) on conflict({e}) do update set ({u}, d_effective, t_modified) = ({x}, excluded.d_effective, current_timestamp) where excluded.d_effective >= {t}_current.d_effective".format(
+			t=table, c=", ".join(columns), p=", ".join(["?"] * len(columns)), e=columns[0], u=", ".join(update_columns), x=", ".join("excluded." + c for c in update_columns))
+		effective = self.getEffectiveDate()
+		cursor.executemany(upsert_sql, [tuple(row) + (effective,) for row in rows])
+
+
+	def getEffectiveDate(self) -> str:
+
+		return self._dbh.getEffectiveDate()
@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+import csv
+import json
+import sys
+from typing import TextIO
+
+
+class DeliveryMetricsOutputWriter(ABC):
+
+	# fields of each record, in output order
+	FIELDS = [
+		'type',
+		'effective_date',
+		'quad',
+		'deliverable',
+		'deliverable_effective',
+		'epic',
+		'epic_effective',
+		'issues',
+		'issues_closed',
+		'percent_complete_issues',
+		'points',
+		'points_closed',
+		'percent_complete_points',
+	]
+
+	def __init__(self, effective_date: str, file_handle: TextIO = None, fields: list = None):
+		self.effective_date = effective_date
+		self.file_handle = file_handle if file_handle is not None else sys.stdout
+		self.fields = fields if fields is not None else self.FIELDS
+		self._quad = None
+		self._deliverable = None
+
+
+	""" public methods """
+
+
+	def startQuad(self, quad_id: int, name: str) -> None:
+
+		self._quad = name
+
+
+	def startDeliverable(self, deliverable_id: int, title: str, effective: str) -> None:
+
+		self._deliverable = (title, effective)
+
+
+	def startEpic(self, epic_id: int, title: str, effective: str) -> None:
+
+		pass
+
+
+	def writeIssue(self, issue_id: int, title: str, effective: str, points: int, closed: bool) -> None:
+
+		pass
+
+
+	def endEpic(self, epic_id: int, title: str, effective: str, total) -> None:
+
+		self.writeRecord(self._record('epic', total, epic=title, epic_effective=effective))
+
+
+	def endDeliverable(self, deliverable_id: int, total) -> None:
+
+		self.writeRecord(self._record('deliverable', total))
+
+
+	@abstractmethod
+	def writeRecord(self, record: dict) -> None:
+
+		# implemented by each format: write one record with the writer's fields
+		pass
+
+
+	def close(self) -> None:
+
+		self.file_handle.flush()
+
+
+	""" private methods """
+
+
+	def _record(self, record_type: str, total, epic: str = None, epic_effective: str = None) -> dict:
+
+		return {
+			'type': record_type,
+			'effective_date': self.effective_date,
+			'quad': self._quad,
+			'deliverable': self._deliverable[0],
+			'deliverable_effective': self._deliverable[1],
+			'epic': epic,
+			'epic_effective': epic_effective,
+			'issues': total.issues,
+			'issues_closed': total.issues_closed,
+			'percent_complete_issues': total.percentCompleteIssues(),
+			'points': total.points,
+			'points_closed': total.points_closed,
+			'percent_complete_points': total.percentCompletePoints(),
+		}
+
+
+class DeliveryMetricsTextWriter(DeliveryMetricsOutputWriter):
+
+	# tab-indented report meant to be read by people; other records are written as a tab-separated table
+
+	def __init__(self, effective_date: str, file_handle: TextIO = None, fields: list = None):
+		super().__init__(effective_date, file_handle, fields)
+		self._header = False
+
+
+	def startQuad(self, quad_id: int, name: str) -> None:
+
+		super().startQuad(quad_id, name)
+		self._write("[QUAD] {}".format(name))
+
+
+	def startDeliverable(self, deliverable_id: int, title: str, effective: str) -> None:
+
+		super().startDeliverable(deliverable_id, title, effective)
+		self._write("\t[DELIVERABLE] {} (effective {})".format(title, effective))
+
+
+	def startEpic(self, epic_id: int, title: str, effective: str) -> None:
+
+		self._write("\t\t[EPIC] {} (effective {})".format(title, effective))
+
+
+	def writeIssue(self, issue_id: int, title: str, effective: str, points: int, closed: bool) -> None:
+
+		self._write("\t\t\t[ISSUE] {} (effective {}, points={}, closed={})".format(title, effective, points, closed))
+
+
+	def endEpic(self, epic_id: int, title: str, effective: str, total) -> None:
+
+		pass
+
+
+	def endDeliverable(self, deliverable_id: int, total) -> None:
+
+		self._write("\t\tTotal Issues: {}".format(str(total.issues)))
+		self._write("\t\tTotal Issues Closed: {}".format(str(total.issues_closed)))
+		self._write("\t\tIssues Complete: {}%".format(str(total.percentCompleteIssues())))
+		self._write("\t\tTotal Points: {}".format(str(total.points)))
+		self._write("\t\tTotal Points Closed: {}".format(str(total.points_closed)))
+		self._write("\t\tPoints Complete: {}%".format(str(total.percentCompletePoints())))
+
+
+	def writeRecord(self, record: dict) -> None:
+
+		if not self._header:
+			self._write("\t".join(self.fields))
+			self._header = True
+		self._write("\t".join(str(record.get(field)) for field in self.fields))
+
+
+	def _write(self, line: str) -> None:
+
+		self.file_handle.write(line + "\n")
+
+
+class DeliveryMetricsJsonWriter(DeliveryMetricsOutputWriter):
+
+	# a single json array, written one element at a time
+
+	def __init__(self, effective_date: str, file_handle: TextIO = None, fields: list = None):
+		super().__init__(effective_date, file_handle, fields)
+		self._count = 0
+
+
+	def writeRecord(self, record: dict) -> None:
+
+		self.file_handle.write(("[\n" if self._count == 0 else ",\n") + json.dumps(record))
+		self._count += 1
+
+
+	def close(self) -> None:
+
+		self.file_handle.write("\n]\n" if self._count > 0 else "[]\n")
+		super().close()
+
+
+class DeliveryMetricsJsonLinesWriter(DeliveryMetricsOutputWriter):
+
+	# one json object per line
+
+
+	def writeRecord(self, record: dict) -> None:
+
+		self.file_handle.write(json.dumps(record) + "\n")
+
+
+class DeliveryMetricsCsvWriter(DeliveryMetricsOutputWriter):
+
+	# one row per record with a header row
+
+	def __init__(self, effective_date: str, file_handle: TextIO = None, fields: list = None):
+		super().__init__(effective_date, file_handle, fields)
+		self._csv = csv.DictWriter(self.file_handle, fieldnames=self.fields, lineterminator="\n")
+		self._csv.writeheader()
+
+
+	def writeRecord(self, record: dict) -> None:
+
+		self._csv.writerow(record)
+
+
+# output formats supported by the metrics script
+OUTPUT_WRITERS = {
+	'text': DeliveryMetricsTextWriter,
+	'json': DeliveryMetricsJsonWriter,
+	'jsonl': DeliveryMetricsJsonLinesWriter,
+	'csv': DeliveryMetricsCsvWriter,
+}
@@ -0,0 +1,194 @@
+from bisect import bisect_right
+import json
+
+# totals of an epic or deliverable: (issues, issues_closed, points, points_closed)
+NO_TOTALS = (0, 0, 0, 0)
+
+class DeliveryMetricsRollup:
+
+	# each issue adds its points and closed state to the rollup of its current epic from each of its fact dates on,
+	# and each epic adds its totals to the deliverable it is mapped to on each date;
+	# issue_rollup_state and epic_rollup_state remember the facts last applied, so a load only applies differences,
+	# to the rollup rows dated on or after each change, whatever order snapshots are loaded in
+
+	def __init__(self, dbh):
+		self._dbh = dbh
+		self.counts = {
+			'issues': 0,
+			'epic_rows': 0,
+			'deliverable_rows': 0
+		}
+
+
+	""" public methods """
+
+
+	def applyChanges(self, issue_ids: list, epic_ids: list) -> None:
+
+		cursor = self._dbh.cursor()
+
+		# differences in issue facts and epics, as changes of epic totals by date
+		epic_events = self._applyIssueChanges(cursor, issue_ids)
+
+		# epics whose totals or deliverable mapping changed
+		epics = sorted(set(epic_events) | set(epic_ids))
+		old_maps = self._readTimelines(cursor, "select epic_id, d_effective, deliverable_id from epic_rollup_state where epic_id in (select value from json_each(?)) order by epic_id, d_effective", epics)
+		new_maps = self._readTimelines(cursor, "select epic_id, d_effective, deliverable_id from epic_deliverable_map where epic_id in (select value from json_each(?)) order by epic_id, d_effective", epics)
+
+		# apply changes to epic rollups, and compare what each epic adds to deliverables before and after, from its first change on
+		deliverable_events = dict()
+		state_rows = []
+		for epic_id in epics:
+			events = epic_events.get(epic_id, {})
+			old_map = old_maps.get(epic_id, [])
+			new_map = new_maps.get(epic_id, [])
+			start = self._firstChange(events, old_map, new_map)
+			if start is None:
+				continue
+			old_totals, new_totals = self._applyEvents(cursor, 'epic_daily_rollup', 'epic_id', epic_id, events, start)
+			self._addEvents(deliverable_events, self._contributions(old_map, old_totals, start), -1)
+			self._addEvents(deliverable_events, self._contributions(new_map, new_totals, start), 1)
+			if old_map != new_map:
+				cursor.execute("delete from epic_rollup_state where epic_id = ?", (epic_id,))
+				state_rows.extend((epic_id, effective, deliverable_id) for effective, deliverable_id in new_map)
+
+		# apply changes to deliverable rollups
+		for deliverable_id, events in deliverable_events.items():
+			self._applyEvents(cursor, 'deliverable_daily_rollup', 'deliverable_id', deliverable_id, events)
+
+		# remember applied epic mappings
+		cursor.executemany("insert into epic_rollup_state (epic_id, d_effective, deliverable_id) values (?, ?, ?)", state_rows)
+		cursor.close()
+
+
+	""" private methods """
+
+
+	def _applyIssueChanges(self, cursor, issue_ids: list) -> dict:
+
+		# facts last applied and current facts of each issue, as (epic_id, points, is_closed) by effective date
+		old_facts = self._readTimelines(cursor, "select issue_id, d_effective, epic_id, points, is_closed from issue_rollup_state where issue_id in (select value from json_each(?)) order by issue_id, d_effective", issue_ids)
+		sql = '''
+			select
+				h.issue_id,
+				h.d_effective,
+				i.epic_id,
+				coalesce(h.points, 0),
+				case when h.is_closed then 1 else 0 end
+			from issue_history h
+			inner join issue i on i.id = h.issue_id
+			where h.issue_id in (select value from json_each(?))
+			order by h.issue_id, h.d_effective
+		'''
+		new_facts = self._readTimelines(cursor, sql, issue_ids)
+
+		# epic id -> effective date -> change of totals
+		events = dict()
+		state_rows = []
+		for issue_id in issue_ids:
+			old_timeline = old_facts.get(issue_id, [])
+			new_timeline = new_facts.get(issue_id, [])
+			if old_timeline == new_timeline:
+				continue
+			for timeline, sign in ((old_timeline, -1), (new_timeline, 1)):
+				self._addEvents(events, [(effective, epic_id, self._totals(points, is_closed)) for effective, (epic_id, points, is_closed) in timeline], sign)
+			cursor.execute("delete from issue_rollup_state where issue_id = ?", (issue_id,))
+			state_rows.extend((issue_id, effective) + facts for effective, facts in new_timeline)
+			self.counts['issues'] += 1
+
+		# remember applied facts
+		cursor.executemany("insert into issue_rollup_state (issue_id, d_effective, epic_id, points, is_closed) values (?, ?, ?, ?, ?)", state_rows)
+
+		return events
+
+
+	def _readTimelines(self, cursor, sql: str, entity_ids: list) -> dict:
+
+		# rows are (entity id, effective date, value...) in entity and date order; entity id -> [(effective date, value)]
+		timelines = dict()
+		for row in cursor.execute(sql, (json.dumps(entity_ids),)):
+			timelines.setdefault(row[0], []).append((row[1], row[2] if len(row) == 3 else tuple(row[2:])))
+
+		return timelines
+
+
+	def _totals(self, points, is_closed) -> tuple:
+
+		return (1, is_closed, points, points * is_closed)
+
+
+	def _addEvents(self, events: dict, timeline: list, sign: int) -> None:
+
+		# timeline is [(effective date, key, totals)]: from each date on, totals count towards key instead of the previous key
+		previous = None
+		for effective, key, totals in timeline:
+			if previous is not None:
+				self._addEvent(events, previous[0], effective, previous[1], -sign)
+			self._addEvent(events, key, effective, totals, sign)
+			previous = (key, totals)
+
+
+	def _addEvent(self, events: dict, key, effective: str, totals: tuple, sign: int) -> None:
+
+		if key is None or totals == NO_TOTALS:
+			return
+
+		changes = events.setdefault(key, dict())
+		changes[effective] = tuple(a + sign * b for a, b in zip(changes.get(effective, NO_TOTALS), totals))
+
+
+	def _firstChange(self, events: dict, old_map: list, new_map: list):
+
+		# earliest date on which the totals or the deliverable of an epic changed
+		changes = [effective for effective, totals in events.items() if totals != NO_TOTALS]
+		for effective in sorted(set(d for d, _ in old_map) | set(d for d, _ in new_map)):
+			if self._valueAt(old_map, effective) != self._valueAt(new_map, effective):
+				changes.append(effective)
+				break
+
+		return min(changes) if len(changes) > 0 else None
+
+
+	def _valueAt(self, timeline: list, effective: str, default=None):
+
+		# value of the latest entry on or before effective date
+		i = bisect_right(timeline, effective, key=lambda entry: entry[0])
+
+		return timeline[i - 1][1] if i > 0 else default
+
+
+	def _contributions(self, deliverable_map: list, totals: list, start: str) -> list:
+
+		# what an epic adds to deliverables from start on: [(effective date, deliverable id, totals)]
+		dates = sorted(set([start] + [d for d, _ in deliverable_map if d > start] + [d for d, _ in totals if d > start]))
+
+		return [(effective, self._valueAt(deliverable_map, effective), self._valueAt(totals, effective, NO_TOTALS)) for effective in dates]
+
+
+	def _applyEvents(self, cursor, table: str, column: str, entity_id: int, events: dict, start: str = None) -> (list, list):
+
+		# rollup rows hold totals from their date until the next row; a change on a date applies to every row from that date on
+		start = min(events) if start is None else start
+		base = cursor.execute("select issues, issues_closed, points, points_closed from {t} where {c} = ? and d_effective < ? order by d_effective desc limit 1".format(t=table, c=column), (entity_id, start)).fetchone()
+		rows = dict((row[0], tuple(row[1:])) for row in cursor.execute("select d_effective, issues, issues_closed, points, points_closed from {t} where {c} = ? and d_effective >= ?".format(t=table, c=column), (entity_id, start)))
+
+		# totals before and after the changes, from start on
+		old_totals = tuple(base) if base is not None else NO_TOTALS
+		change = NO_TOTALS
+		old_timeline = [(start, old_totals)]
+		new_timeline = [(start, old_totals)]
+		upserts = []
+		for effective in sorted(set(rows) | set(events)):
+			old_totals = rows.get(effective, old_totals)
+			change = tuple(a + b for a, b in zip(change, events.get(effective, NO_TOTALS)))
+			new_totals = tuple(a + b for a, b in zip(old_totals, change))
+			old_timeline.append((effective, old_totals))
+			new_timeline.append((effective, new_totals))
+			if new_totals != old_totals or (effective not in rows and effective in events):
+				upserts.append((entity_id, effective) + new_totals)
+
+		upsert_sql = "insert into {t} ({c}, d_effective, issues, issues_closed, points, points_closed, t_modified) values (?, ?, ?, ?, ?, ?, current_timestamp) on conflict({c}, d_effective) do update set (issues, issues_closed, points, points_closed, t_modified) = (excluded.issues, excluded.issues_closed, excluded.points, excluded.points_closed, current_timestamp)".format(t=table, c=column)
+		cursor.executemany(upsert_sql, upserts)
+		self.counts['epic_rows' if table == 'epic_daily_rollup' else 'deliverable_rows'] += len(upserts)
+
+		return old_timeline, new_timeline
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from typing import Iterator
+import json
+import sys
+import time
+
+# resource module is not available on all platforms
+try:
+	import resource
+except ImportError:
+	resource = None
+
+class DeliveryMetricsRunMetrics:
+
+	def __init__(self):
+		self._perf_start = time.perf_counter()
+		self.started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+		self.phases = {}
+		self.rows = {}
+		self.statements = 0
+		self.info = {}
+
+
+	""" public methods """
+
+
+	@contextmanager
+	def phase(self, name: str):
+
+		# accumulate wall clock time spent in the block
+		perf_start = time.perf_counter()
+		try:
+			yield self
+		finally:
+			self.addTime(name, time.perf_counter() - perf_start)
+
+
+	def timeIterator(self, name: str, items: Iterator) -> Iterator:
+
+		# accumulate only the time spent producing items, not the time the consumer spends on them
+		iterator = iter(items)
+		while True:
+			perf_start = time.perf_counter()
+			try:
+				item = next(iterator)
+			except StopIteration:
+				self.addTime(name, time.perf_counter() - perf_start)
+				return
+			self.addTime(name, time.perf_counter() - perf_start)
+			yield item
+
+
+	def addTime(self, name: str, seconds: float) -> None:
+
+		self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+	def addRows(self, name: str, count: int) -> None:
+
+		self.rows[name] = self.rows.get(name, 0) + count
+
+
+	def traceStatement(self, statement: str) -> None:
+
+		# sqlite3 trace callback: called once per executed statement
+		self.statements += 1
+
+
+	def peakRss(self) -> int:
+
+		if resource is None:
+			return None
+
+		# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+		max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+	def record(self) -> dict:
+
+		phases = {}
+		for name, seconds in self.phases.items():
+			phase = {'seconds': round(seconds, 4)}
+			if name in self.rows:
+				phase['rows'] = self.rows[name]
+				phase['rows_per_second'] = round(self.rows[name] / seconds, 1) if seconds > 0 else None
+			phases[name] = phase
+
+		record = dict(self.info)
+		record.update({
+			'started': self.started,
+			'elapsed_seconds': round(time.perf_counter() - self._perf_start, 4),
+			'phases': phases,
+			'sql_statements': self.statements,
+			'peak_rss_bytes': self.peakRss()
+		})
+
+		return record
+
+
+	def emit(self, file_path: str = None) -> None:
+
+		# print machine-readable record and optionally append it to a json lines file
+		line = json.dumps(self.record())
+		print("run metrics: {}".format(line))
+
+		if file_path is not None:
+			try:
+				with open(file_path, 'a') as f:
+					f.write(line + "\n")
+			except IOError:
+				print("WARNING: unable to write run metrics to file: {}".format(file_path))
@@ -0,0 +1,215 @@
+from os.path import dirname, abspath
+import re
+import sqlite3
+import sys
+
+SCHEMA_PATH = dirname(dirname(dirname(abspath(__file__)))) + "/sql/create_delivery_metrics_db.sql"
+
+class DeliveryMetricsSchema:
+
+	# brings a database created by an older create_delivery_metrics_db.sql up to date without losing history:
+	# missing tables, columns and indexes are added; tables derived from the facts are recreated and refilled from them
+
+	# tables whose rows can be derived from the dimension and fact tables
+	ROLLUP_TABLES = ['epic_daily_rollup', 'deliverable_daily_rollup', 'issue_rollup_state', 'epic_rollup_state']
+	CURRENT_TABLES = ['deliverable_quad_map_current', 'epic_deliverable_map_current', 'issue_history_current', 'issue_sprint_map_current']
+	DERIVED_TABLES = ROLLUP_TABLES + CURRENT_TABLES + ['snapshot_item_digest', 'percent_complete_cache', 'percent_complete_cache_date']
+
+	def __init__(self, dbh, schema_path: str = SCHEMA_PATH):
+		self._dbh = dbh
+		self._schema_path = schema_path
+		self._reference = None
+
+
+	""" public methods """
+
+
+	def changes(self) -> list:
+
+		# differences between the database and the schema script, as (kind, name, detail)
+		reference = self._referenceSchema()
+		cursor = self._dbh.cursor()
+		changes = []
+
+		for table, table_sql in reference['tables'].items():
+			columns = self._columns(cursor, table)
+			if len(columns) == 0:
+				changes.append(('create_table', table, table_sql))
+				continue
+			reference_columns = reference['columns'][table]
+			if self._isCompatible(columns, reference_columns):
+				names = set(c[1] for c in columns)
+				for column in reference_columns:
+					if column[1] not in names:
+						changes.append(('add_column', table, self._columnDefinition(column)))
+			elif table in self.DERIVED_TABLES:
+				changes.append(('recreate_table', table, table_sql))
+			else:
+				changes.append(('incompatible_table', table, table_sql))
+
+		# indexes of created tables are created with them, and recreated ones lose theirs
+		created = set(name for kind, name, _ in changes if kind in ('create_table', 'recreate_table'))
+		existing = dict(cursor.execute("select name, sql from sqlite_master where type = 'index' and sql is not null").fetchall())
+		for index, (table, index_sql) in reference['indexes'].items():
+			if table in created or self._normalize(existing.get(index)) != self._normalize(index_sql):
+				changes.append(('create_index', index, index_sql))
+
+		cursor.close()
+
+		return changes
+
+
+	def describe(self, change: tuple) -> str:
+
+		kind, name, sql = change
+		if kind == 'add_column':
+			name = "{}.{}".format(name, sql.split()[0])
+
+		return "{} {}".format(kind.replace('_', ' '), name)
+
+
+	def isCurrent(self) -> bool:
+
+		return len(self.changes()) == 0
+
+
+	def requireCurrent(self) -> None:
+
+		# scripts that only read the database cannot migrate it
+		changes = self.changes()
+		if len(changes) > 0:
+			print("FATAL: database schema is out of date ({} change(s), e.g. {}); run ./src/loader/migrate_db.py or load a snapshot to migrate it".format(len(changes), self.describe(changes[0])))
+			sys.exit()
+
+
+	def migrate(self) -> list:
+
+		# apply changes in the caller's transaction; returns the changes that were applied
+		changes = self.changes()
+		if len(changes) == 0:
+			return changes
+
+		incompatible = [name for kind, name, _ in changes if kind == 'incompatible_table']
+		if len(incompatible) > 0:
+			print("FATAL: cannot migrate table(s) {}; recreate the database with sql/create_delivery_metrics_db.sql and reload".format(", ".join(incompatible)))
+			sys.exit()
+
+		cursor = self._dbh.cursor()
+		created = set()
+		for kind, name, sql in changes:
+			print("migrating schema: {}".format(self.describe((kind, name, sql))))
+			if kind == 'add_column':
+				cursor.execute("alter table {} add column {}".format(name, sql))
+				continue
+			if kind == 'recreate_table':
+				cursor.execute("drop table {}".format(name))
+			if kind == 'create_index':
+				cursor.execute("drop index if exists {}".format(name))
+			else:
+				created.add(name)
+			cursor.execute(sql)
+
+		# refill derived tables from the facts
+		if 'data_version' in created:
+			cursor.execute("insert or ignore into data_version (id, version) values (1, 0)")
+		for table in self.CURRENT_TABLES:
+			if table in created:
+				self._fillCurrentTable(cursor, table)
+		if len(created & set(self.ROLLUP_TABLES)) > 0:
+			self._rebuildRollups(cursor)
+
+		cursor.close()
+
+		return changes
+
+
+	""" private methods """
+
+
+	def _referenceSchema(self) -> dict:
+
+		# tables, columns and indexes of a database created from the schema script
+		if self._reference is not None:
+			return self._reference
+
+		with open(self._schema_path, 'r') as f:
+			script = f.read()
+		dbh = sqlite3.connect(":memory:")
+		dbh.executescript(script)
+		tables = dict(dbh.execute("select name, sql from sqlite_master where type = 'table' and name not like 'sqlite!_%' escape '!' order by rowid").fetchall())
+		self._reference = {
+			'tables': tables,
+			'columns': dict((table, self._columns(dbh, table)) for table in tables),
+			'indexes': dict((name, (table, sql)) for name, table, sql in dbh.execute("select name, tbl_name, sql from sqlite_master where type = 'index' and sql is not null order by rowid")),
+		}
+		dbh.close()
+
+		return self._reference
+
+
+	def _columns(self, cursor, table: str) -> list:
+
+		# (cid, name, type, notnull, dflt_value, pk) of each column; empty if the table does not exist
+		return [tuple(row) for row in cursor.execute("pragma table_info({})".format(table))]
+
+
+	def _isCompatible(self, columns: list, reference_columns: list) -> bool:
+
+		# columns can be added in place if the table has no column the schema lacks, the same primary key,
+		# and every missing column can be added with alter table
+		names = set(c[1] for c in columns)
+		reference_names = set(c[1] for c in reference_columns)
+		if not names <= reference_names:
+			return False
+		if self._primaryKey(columns) != self._primaryKey(reference_columns):
+			return False
+		for column in reference_columns:
+			if column[1] not in names and (column[5] > 0 or (column[3] and column[4] is None)):
+				return False
+
+		return True
+
+
+	def _primaryKey(self, columns: list) -> list:
+
+		return [c[1] for c in sorted(columns, key=lambda c: c[5]) if c[5] > 0]
+
+
+	def _columnDefinition(self, column: tuple) -> str:
+
+		_, name, column_type, not_null, default, _ = column
+		definition = "{} {}".format(name, column_type)
+		if not_null:
+			definition += " NOT NULL"
+		if default is not None:
+			definition += " DEFAULT {}".format(default)
+
+		return definition
+
+
+	def _normalize(self, sql: str) -> str:
+
+		return re.sub(r"\s+", " ", sql.strip().lower()) if sql is not None else None
+
+
+	def _fillCurrentTable(self, cursor, table: str) -> None:
+
+		# latest fact row of each entity
+		fact_table = table[:-len('_current')]
+		columns = [c[1] for c in self._referenceSchema()['columns'][table] if c[1] != 't_modified']
+		entity = self._primaryKey(self._referenceSchema()['columns'][table])[0]
+		cursor.execute("insert into {c} ({cols}, t_modified) select {cols}, current_timestamp from {f} h where h.d_effective = (select max(d_effective) from {f} where {e} = h.{e})".format(
+			c=table, f=fact_table, e=entity, cols=", ".join(columns)))
+
+
+	def _rebuildRollups(self, cursor) -> None:
+
+		# empty rollups and rollup state, then apply the facts of every issue and epic as changes
+		from delivery_metrics_rollup import DeliveryMetricsRollup
+		for table in self.ROLLUP_TABLES:
+			cursor.execute("delete from {}".format(table))
+		issue_ids = [row[0] for row in cursor.execute("select id from issue order by id")]
+		epic_ids = [row[0] for row in cursor.execute("select id from epic order by id")]
+		rollup = DeliveryMetricsRollup(self._dbh)
+		rollup.applyChanges(issue_ids, epic_ids)
+		print("rebuilt rollups of {} issue(s) and {} epic(s)".format(len(issue_ids), len(epic_ids)))
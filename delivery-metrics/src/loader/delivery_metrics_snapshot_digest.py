@@ -0,0 +1,101 @@
+import hashlib
+import json
+from typing import Iterator
+
+class DeliveryMetricsSnapshotDigest:
+
+	def __init__(self, dbh, key_field: str = 'issue_url'):
+		self._dbh = dbh
+		self._key_field = key_field
+		self._hashes = {}
+		self._latest_effective = None
+		self.begin()
+
+
+	""" public methods """
+
+
+	def load(self) -> None:
+
+		# read digest of previously loaded snapshot
+		cursor = self._dbh.cursor()
+		for item_key, item_hash, effective in cursor.execute("select item_key, item_hash, d_effective from snapshot_item_digest"):
+			self._hashes[item_key] = item_hash
+			if self._latest_effective is None or effective > self._latest_effective:
+				self._latest_effective = effective
+		cursor.close()
+
+
+	def begin(self) -> None:
+
+		# reset per-snapshot state so one digest can be reused across consecutive snapshots
+		self._seen = set()
+		self._changed = {}
+		self.counts = {
+			'added': 0,
+			'changed': 0,
+			'unchanged': 0,
+			'removed': 0
+		}
+
+
+	def isCurrent(self) -> bool:
+
+		# digest can only be diffed against (and replaced by) a snapshot that is not older than it
+		effective = self._dbh.getEffectiveDate()
+		return self._latest_effective is None or self._latest_effective <= effective
+
+
+	def filterItems(self, items: Iterator, skip_unchanged: bool = True) -> Iterator:
+
+		for item in items:
+
+			# items without a key cannot be diffed, so always pass them through
+			item_key = item.get(self._key_field) if isinstance(item, dict) else None
+			if item_key is None:
+				yield item
+				continue
+
+			# compare with hash from previous snapshot
+			item_hash = self.itemHash(item)
+			old_hash = self._hashes.get(item_key)
+			self._seen.add(item_key)
+
+			if old_hash == item_hash:
+				self.counts['unchanged'] += 1
+				if not skip_unchanged:
+					yield item
+				continue
+
+			self.counts['added' if old_hash is None else 'changed'] += 1
+			self._changed[item_key] = item_hash
+			yield item
+
+
+	def save(self) -> None:
+
+		effective = self._dbh.getEffectiveDate()
+		cursor = self._dbh.cursor()
+
+		# write hashes of added and changed items
+		upsert_sql = "insert into snapshot_item_digest (item_key, item_hash, d_effective) values (?, ?, ?) on conflict(item_key) do update set (item_hash, d_effective) = (excluded.item_hash, excluded.d_effective)"
+		cursor.executemany(upsert_sql, [(k, h, effective) for k, h in self._changed.items()])
+
+		# drop items that are no longer in the snapshot
+		removed = [(k,) for k in self._hashes if k not in self._seen]
+		cursor.executemany("delete from snapshot_item_digest where item_key = ?", removed)
+		self.counts['removed'] = len(removed)
+
+		cursor.close()
+
+		# digest now describes this snapshot
+		for (item_key,) in removed:
+			del self._hashes[item_key]
+		self._hashes.update(self._changed)
+		self._latest_effective = effective
+
+
+	def itemHash(self, item: dict) -> str:
+
+		content = json.dumps(item, sort_keys=True, separators=(',', ':'))
+		return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
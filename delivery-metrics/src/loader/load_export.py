@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(dirname(dirname(dirname(abspath(__file__))))) + '/linters/export_delivery_data')
+
+from argparse import ArgumentParser
+from dataclasses import asdict
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_loader import DeliveryMetricsDataLoader
+from join_parent_issues import HierarchyReport, dump_to_json, tee_to_jsonl, transform_issue_data
+import time
+
+def parseDateArg(d):
+	return time.strptime(d, '%Y%m%d')
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Transform exported roadmap and sprint data and load it into the delivery metrics database in one process")
+	parser.add_argument("--sprint-file-in", dest="sprint_file", metavar="FILEPATH", required=True, help="path of json file with sprint data exported from github")
+	parser.add_argument("--roadmap-file-in", dest="roadmap_file", metavar="FILEPATH", required=True, help="path of json file with roadmap data exported from github")
+	parser.add_argument("--task-file-out", dest="task_file", metavar="FILEPATH", help="also write the transformed items to this json lines file, e.g. for auditing")
+	parser.add_argument("--report-file-out", dest="report_file", metavar="FILEPATH", help="write cycles and missing parents found in the issue hierarchy to this json file")
+	parser.add_argument("-e", dest="yyyymmdd", type=parseDateArg, help="effective date to apply to transformed items")
+	parser.add_argument("-p", "--profile", default="bulk-load", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: bulk-load)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
+	parser.add_argument("-m", "--metrics-file", dest="metrics_file", metavar="FILEPATH", help="append a json record of run metrics to this file")
+	parser.add_argument("-i", "--incremental", action="store_true", help="only load items that were added or changed since the last loaded snapshot")
+
+	# get command line args
+	args = parser.parse_args()
+
+	# initialize config object
+	config = DeliveryMetricsConfig(args.yyyymmdd, args.profile, args.db_path)
+
+	# transformed items are handed to the loader as they are produced, without an intermediate file
+	report = HierarchyReport()
+	items = transform_issue_data(args.sprint_file, args.roadmap_file, report)
+	if args.task_file is not None:
+		items = tee_to_jsonl(args.task_file, items)
+
+	# load data
+	print("...\nrunning data loader with effective date {}".format(config.effectiveDate()))
+	loader = DeliveryMetricsDataLoader(config, None, args.incremental)
+	loader.loadItems(items, "export of {} and {}".format(args.roadmap_file, args.sprint_file))
+	loader.metrics.emit(args.metrics_file)
+	loader = None
+
+	# report problems in the issue hierarchy
+	for line in report.summary():
+		print("WARNING: {}".format(line))
+	if args.report_file is not None:
+		dump_to_json(args.report_file, asdict(report))
+
+	print("data loader is done")
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
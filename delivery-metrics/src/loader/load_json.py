@@ -5,6 +5,7 @@ from delivery_metrics_config import DeliveryMetricsConfig
 from delivery_metrics_loader import DeliveryMetricsDataLoader
 import functools 
 import os.path 
+import sys
 import time
 
 def parseDateArg(d):
@@ -18,21 +19,30 @@ if __name__ == "__main__":
 	# define command line args
 	parser = ArgumentParser(description="Load a json file into the delivery metrics database")
 	group = parser.add_mutually_exclusive_group(required=True)
-	group.add_argument("file", type=FileType("r"), nargs="?", metavar="FILEPATH", help="path of json file to load")
+	group.add_argument("file", type=FileType("r"), nargs="?", metavar="FILEPATH", help="path of json or json lines file to load, or - to stream from stdin")
 	parser.add_argument("-e", dest="yyyymmdd", type=parseDateArg, help="effective date to apply to records in json file")
+	parser.add_argument("-p", "--profile", default="bulk-load", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: bulk-load)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
+	parser.add_argument("-m", "--metrics-file", dest="metrics_file", metavar="FILEPATH", help="append a json record of run metrics to this file")
+	parser.add_argument("-i", "--incremental", action="store_true", help="only load items that were added or changed since the last loaded snapshot")
 
 	# get command line args
 	args = parser.parse_args()
-	args.file.close()
-	file_path = os.path.abspath(args.file.name)
+	if args.file is not sys.stdin:
+		args.file.close()
 
 	# initialize config object
-	config = DeliveryMetricsConfig(args.yyyymmdd)
+	config = DeliveryMetricsConfig(args.yyyymmdd, args.profile, args.db_path)
 
 	# load data
 	print("...\nrunning data loader with effective date {}".format(config.effectiveDate()))
-	loader = DeliveryMetricsDataLoader(config, file_path)
-	loader.loadData()
+	if args.file is sys.stdin:
+		loader = DeliveryMetricsDataLoader(config, "<stdin>", args.incremental)
+		loader.loadFile(args.file, "<stdin>")
+	else:
+		loader = DeliveryMetricsDataLoader(config, os.path.abspath(args.file.name), args.incremental)
+		loader.loadData()
+	loader.metrics.emit(args.metrics_file)
 	loader = None
 
 	print("data loader is done")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_database import DeliveryMetricsDatabase
+from delivery_metrics_schema import DeliveryMetricsSchema
+import time
+
+
+if __name__ == "__main__":
+
+	perf_start = time.perf_counter()
+
+	# define command line args
+	parser = ArgumentParser(description="Bring a delivery metrics database created with an older schema up to date, keeping its history")
+	parser.add_argument("-p", "--profile", default="safe", choices=DeliveryMetricsConfig.PROFILES.keys(), help="sqlite performance profile (default: safe)")
+	parser.add_argument("-d", "--db", dest="db_path", metavar="DBPATH", help="path of sqlite database (default: db/delivery_metrics.db)")
+	parser.add_argument("-n", "--dry-run", dest="dry_run", action="store_true", help="list the changes without applying them")
+
+	# get command line args
+	args = parser.parse_args()
+
+	# initialize config object
+	config = DeliveryMetricsConfig(None, args.profile, args.db_path)
+	db = DeliveryMetricsDatabase(config)
+	schema = DeliveryMetricsSchema(db)
+
+	# list or apply changes in a single transaction
+	print("...")
+	if args.dry_run:
+		changes = schema.changes()
+		for change in changes:
+			print(schema.describe(change))
+	else:
+		with db.transaction():
+			changes = schema.migrate()
+	print("{} schema change(s)".format(len(changes)))
+	db.disconnect()
+
+	# measure execution time
+	elapsed_time = round(time.perf_counter() - perf_start, 4)
+	print("elapsed time: {} seconds".format(elapsed_time))
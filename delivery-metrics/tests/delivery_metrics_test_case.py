@@ -0,0 +1,97 @@
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(dirname(abspath(__file__))) + '/src')
+sys.path.insert(0, dirname(dirname(abspath(__file__))) + '/src/loader')
+
+from calculate_percent_complete import DeliveryMetricsPercentComplete
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_loader import DeliveryMetricsDataLoader
+from delivery_metrics_output_writer import DeliveryMetricsJsonLinesWriter
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+SCHEMA_PATH = dirname(dirname(abspath(__file__))) + "/sql/create_delivery_metrics_db.sql"
+REPO_URL = "https://github.com/example/repo/issues/"
+
+# epics and the deliverable each belongs to unless a snapshot says otherwise
+EPIC_DELIVERABLES = {1: 1, 2: 2}
+
+
+def item(issue, epic, points=1, closed=False, deliverable=None):
+
+	# one exported task-level issue, with its epic, deliverable and quad
+	deliverable = deliverable if deliverable is not None else EPIC_DELIVERABLES[epic]
+	return {
+		'issue_title': "Issue {}".format(issue),
+		'issue_url': REPO_URL + str(100 + issue),
+		'issue_parent': REPO_URL + str(10 + epic),
+		'issue_type': "Task",
+		'issue_is_closed': closed,
+		'issue_opened_at': "2024-08-01T00:00:00Z",
+		'issue_closed_at': None,
+		'issue_points': points,
+		'issue_status': "Done" if closed else "Todo",
+		'sprint_id': None,
+		'quad_id': "q1",
+		'quad_name': "Quad 1",
+		'quad_start': "2024-08-01",
+		'quad_length': 91,
+		'quad_end': "2024-10-31",
+		'deliverable_pillar': None,
+		'deliverable_url': REPO_URL + str(deliverable),
+		'deliverable_title': "Deliverable {}".format(deliverable),
+		'epic_url': REPO_URL + str(10 + epic),
+		'epic_title': "Epic {}".format(epic),
+	}
+
+
+class DeliveryMetricsTestCase(unittest.TestCase):
+
+	# each test loads exports into its own database created from the schema
+
+	def setUp(self):
+		self.work_dir = tempfile.mkdtemp(prefix="delivery-metrics-test-")
+		self.db_path = os.path.join(self.work_dir, "delivery_metrics.db")
+		dbh = sqlite3.connect(self.db_path)
+		with open(SCHEMA_PATH, 'r') as f:
+			dbh.executescript(f.read())
+		dbh.close()
+
+
+	def tearDown(self):
+		shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+	def load(self, yyyymmdd, items, incremental=False):
+		file_path = os.path.join(self.work_dir, "export-{}.jsonl".format(yyyymmdd))
+		with open(file_path, 'w') as f:
+			for i in items:
+				f.write(json.dumps(i) + "\n")
+		config = DeliveryMetricsConfig(time.strptime(yyyymmdd, '%Y%m%d'), 'safe', self.db_path)
+		loader = DeliveryMetricsDataLoader(config, file_path, incremental)
+		with contextlib.redirect_stdout(io.StringIO()):
+			loader.loadData()
+			loader.db.disconnect()
+
+
+	def totals(self, yyyymmdd, verbose=False, columnar=False):
+		config = DeliveryMetricsConfig(time.strptime(yyyymmdd, '%Y%m%d'), 'read-mostly', self.db_path)
+		output = io.StringIO()
+		writer = DeliveryMetricsJsonLinesWriter(config.effectiveDate(), output)
+		with contextlib.redirect_stdout(io.StringIO()):
+			metrics = DeliveryMetricsPercentComplete(config, verbose, False, writer, 1, columnar)
+			metrics.calculate()
+			metrics.dbh.disconnect()
+		return self.deliverableTotals(output)
+
+
+	def deliverableTotals(self, output):
+		records = [json.loads(line) for line in output.getvalue().splitlines()]
+		return dict((r['deliverable'], (r['issues'], r['issues_closed'], r['points'], r['points_closed'])) for r in records if r['type'] == 'deliverable')
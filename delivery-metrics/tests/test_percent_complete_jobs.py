@@ -0,0 +1,46 @@
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(abspath(__file__)))
+
+from delivery_metrics_test_case import DeliveryMetricsTestCase, item
+from calculate_percent_complete import DeliveryMetricsPercentComplete
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_output_writer import DeliveryMetricsJsonLinesWriter
+import contextlib
+import io
+import time
+import unittest
+
+
+class PercentCompleteJobsTest(DeliveryMetricsTestCase):
+
+	# -j workers must report the data version the report started with, even if a load commits while they read
+
+	def testLoadDuringVerboseReport(self):
+		self.load('20240901', [item(1, 1), item(2, 1), item(3, 2)])
+		expected = self.totals('20240901', verbose=True)
+
+		config = DeliveryMetricsConfig(time.strptime('20240901', '%Y%m%d'), 'read-mostly', self.db_path)
+		output = io.StringIO()
+		status = io.StringIO()
+		metrics = DeliveryMetricsPercentComplete(config, True, False, DeliveryMetricsJsonLinesWriter(config.effectiveDate(), output), 2)
+
+		# commit a load after the report's snapshot was taken, before the workers read issues
+		get_epics = metrics.getEpics
+		def getEpicsThenLoad(cursor, deliverable_ids):
+			epics = get_epics(cursor, deliverable_ids)
+			self.load('20240901', [item(1, 1, closed=True), item(2, 1), item(3, 2), item(4, 2)])
+			return epics
+		metrics.getEpics = getEpicsThenLoad
+
+		with contextlib.redirect_stdout(status):
+			metrics.calculate()
+			metrics.dbh.disconnect()
+
+		self.assertEqual(self.deliverableTotals(output), expected)
+		self.assertIn("WARNING: data changed since the report started", status.getvalue())
+		self.assertNotEqual(self.totals('20240901', verbose=True), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,61 @@
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(dirname(abspath(__file__))) + '/bench')
+
+from check_query_plans import DeliveryMetricsPlanCheck, REQUIRED_COVERING_INDEXES, createDatabase
+import contextlib
+import io
+import re
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+
+class QueryPlanTest(unittest.TestCase):
+
+	# the statements of the loader and metrics scripts must not scan tables that grow with the data;
+	# bench/check_query_plans.py runs the same check on large data
+
+	# enough deliverables that some are in the first quad, so verbose mode reads issues as of the first day
+	ISSUES = 400
+	DELIVERABLES = 8
+	DAYS = 3
+
+	def setUp(self):
+		self.work_dir = tempfile.mkdtemp(prefix="delivery-metrics-plans-test-")
+		self.checker = DeliveryMetricsPlanCheck(createDatabase(self.work_dir))
+		with contextlib.redirect_stdout(io.StringIO()):
+			self.checker.run(self.work_dir, self.ISSUES, self.DAYS, self.DELIVERABLES)
+
+
+	def tearDown(self):
+		shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+	def check(self):
+		with contextlib.redirect_stdout(io.StringIO()):
+			failures = self.checker.check()
+		return [(label, " ".join(statement.split())[:200], scans, missing) for label, statement, scans, missing in failures]
+
+
+	def testNoUnexpectedTableScans(self):
+		# each distinct statement is recorded under the first label that ran it
+		labels = set(label for label, _ in self.checker.statements.values())
+		self.assertTrue({"load full", "metrics current", "metrics history", "metrics verbose", "burn-up", "sprint metrics"} <= labels, labels)
+		for pattern, reason in REQUIRED_COVERING_INDEXES:
+			self.assertTrue(any(re.match(pattern, statement, re.DOTALL) for _, statement in self.checker.statements.values()), "no statement ran for: {}".format(reason))
+		self.assertEqual(self.check(), [])
+
+
+	def testMissingCoveringIndexFails(self):
+		dbh = sqlite3.connect(self.checker.db_path)
+		dbh.execute("drop index ih_i1")
+		dbh.close()
+		missing = [m for _, _, _, m in self.check() if m is not None]
+		self.assertGreater(len(missing), 0)
+		self.assertTrue(all(m.startswith("issue_history") for m in missing), missing)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,59 @@
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(abspath(__file__)))
+
+from delivery_metrics_test_case import DeliveryMetricsTestCase, item
+import unittest
+
+
+class RollupLoadOrderTest(DeliveryMetricsTestCase):
+
+	# daily rollups must give the same deliverable totals as totalling issues (-v) and the columnar engine (-c),
+	# whatever order snapshots are loaded in
+
+	DATES = ['20240831', '20240901', '20240902', '20240903', '20240904']
+
+	def assertConsistentTotals(self, expected=None):
+		for yyyymmdd in self.DATES:
+			rollups = self.totals(yyyymmdd)
+			self.assertEqual(rollups, self.totals(yyyymmdd, verbose=True), "rollups vs -v as of {}".format(yyyymmdd))
+			self.assertEqual(rollups, self.totals(yyyymmdd, columnar=True), "rollups vs -c as of {}".format(yyyymmdd))
+			if expected is not None and yyyymmdd in expected:
+				self.assertEqual(rollups, expected[yyyymmdd], "totals as of {}".format(yyyymmdd))
+
+
+	def testBackfillAfterEpicMove(self):
+		# issue 3 moves to epic 2 on 0903 without any new fact, then 0902 is backfilled with it still in epic 1
+		self.load('20240901', [item(1, 1), item(2, 1), item(3, 1), item(4, 2)])
+		self.load('20240903', [item(1, 1), item(2, 1), item(3, 2), item(4, 2)])
+		self.load('20240902', [item(1, 1), item(2, 1), item(3, 1), item(4, 2)])
+		self.assertConsistentTotals({
+			'20240902': {'Deliverable 1': (3, 0, 3, 0), 'Deliverable 2': (1, 0, 1, 0)},
+			'20240903': {'Deliverable 1': (3, 0, 3, 0), 'Deliverable 2': (1, 0, 1, 0)},
+		})
+
+
+	def testEpicMoveInDateOrder(self):
+		# an issue counts under its current epic on every date
+		self.load('20240901', [item(1, 1), item(2, 1), item(3, 1, points=3)])
+		self.load('20240902', [item(1, 1), item(2, 1, closed=True), item(3, 2, points=3)])
+		self.load('20240903', [item(1, 1), item(2, 1, closed=True), item(3, 2, points=5)])
+		self.assertConsistentTotals({
+			'20240901': {'Deliverable 1': (2, 0, 2, 0)},
+			'20240902': {'Deliverable 1': (2, 1, 2, 1), 'Deliverable 2': (1, 0, 3, 0)},
+			'20240903': {'Deliverable 1': (2, 1, 2, 1), 'Deliverable 2': (1, 0, 5, 0)},
+		})
+
+
+	def testBackfillOfIssueChangesAndEpicMappings(self):
+		# facts and epic mappings dated before, between and on the latest loaded dates, loaded incrementally
+		self.load('20240904', [item(1, 1, points=2), item(2, 2, closed=True), item(3, 2)], incremental=True)
+		self.load('20240901', [item(1, 1), item(2, 1), item(4, 2, points=8)], incremental=True)
+		self.load('20240903', [item(1, 1, points=3, deliverable=2), item(2, 2), item(3, 2)], incremental=True)
+		self.load('20240902', [item(1, 1, closed=True), item(2, 2), item(3, 2, points=5)], incremental=True)
+		self.load('20240902', [item(1, 1), item(2, 2), item(3, 2, points=5)], incremental=True)
+		self.assertConsistentTotals()
+
+
+if __name__ == "__main__":
+	unittest.main()
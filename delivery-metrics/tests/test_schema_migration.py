@@ -0,0 +1,78 @@
+from os.path import dirname, abspath
+import sys
+sys.path.insert(0, dirname(abspath(__file__)))
+
+from delivery_metrics_test_case import DeliveryMetricsTestCase, item
+from delivery_metrics_config import DeliveryMetricsConfig
+from delivery_metrics_database import DeliveryMetricsDatabase
+from delivery_metrics_schema import DeliveryMetricsSchema
+import contextlib
+import io
+import sqlite3
+import time
+import unittest
+
+# turns a database created from the current schema into one shaped like the schema before row hashes,
+# current state tables, the result cache and daily rollups, keeping its dimension and fact rows
+DOWNGRADE_SQL = '''
+	drop index ih_i1;
+	alter table issue_history drop column row_hash;
+	create index ih_i1 on issue_history(issue_id, d_effective);
+	alter table epic drop column row_hash;
+	drop table issue_history_current;
+	drop table epic_deliverable_map_current;
+	drop table data_version;
+	drop table percent_complete_cache;
+	drop table epic_daily_rollup;
+	drop table deliverable_daily_rollup;
+	drop table issue_rollup_state;
+	drop table epic_rollup_state;
+	create table issue_rollup_state (
+		issue_id INTEGER PRIMARY KEY,
+		epic_id INTEGER,
+		deliverable_id INTEGER,
+		points INTEGER NOT NULL DEFAULT 0,
+		is_closed INTEGER NOT NULL DEFAULT 0,
+		d_effective DATE NOT NULL
+	);
+'''
+
+
+class SchemaMigrationTest(DeliveryMetricsTestCase):
+
+	# a database created with an older schema keeps its history and is brought up to date by the next load
+
+	def schema(self):
+		config = DeliveryMetricsConfig(None, 'safe', self.db_path)
+		return DeliveryMetricsSchema(DeliveryMetricsDatabase(config))
+
+
+	def testLoadMigratesOlderSchema(self):
+		self.load('20240901', [item(1, 1), item(2, 1, points=3), item(3, 2)])
+		self.load('20240902', [item(1, 1, closed=True), item(2, 1, points=3), item(3, 2, points=5)])
+		dbh = sqlite3.connect(self.db_path)
+		dbh.executescript(DOWNGRADE_SQL)
+		dbh.close()
+
+		# scripts that only read the database refuse to run on it
+		with contextlib.redirect_stdout(io.StringIO()):
+			self.assertFalse(self.schema().isCurrent())
+			with self.assertRaises(SystemExit):
+				self.schema().requireCurrent()
+
+		self.load('20240903', [item(1, 1, closed=True), item(2, 1, points=3), item(3, 2, points=5), item(4, 2)])
+		with contextlib.redirect_stdout(io.StringIO()):
+			self.assertTrue(self.schema().isCurrent())
+
+		expected = {
+			'20240901': {'Deliverable 1': (2, 0, 4, 0), 'Deliverable 2': (1, 0, 1, 0)},
+			'20240902': {'Deliverable 1': (2, 1, 4, 1), 'Deliverable 2': (1, 0, 5, 0)},
+			'20240903': {'Deliverable 1': (2, 1, 4, 1), 'Deliverable 2': (2, 0, 6, 0)},
+		}
+		for yyyymmdd, totals in expected.items():
+			self.assertEqual(self.totals(yyyymmdd), totals, "rollups as of {}".format(yyyymmdd))
+			self.assertEqual(self.totals(yyyymmdd, verbose=True), totals, "-v as of {}".format(yyyymmdd))
+
+
+if __name__ == "__main__":
+	unittest.main()
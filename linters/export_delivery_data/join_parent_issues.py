@@ -2,7 +2,10 @@
 
 import argparse
 import json
-from dataclasses import dataclass, field
+import sys
+from collections.abc import Iterable, Iterator
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field, fields
 from enum import Enum
 
 
@@ -17,7 +20,24 @@ class IssueType(Enum):
     NONE = None
 
 
-@dataclass
+# Fields whose values repeat across many issues, e.g. the same sprint or quad
+INTERNED_FIELDS = (
+    "issue_parent",
+    "issue_type",
+    "issue_status",
+    "sprint_id",
+    "sprint_name",
+    "sprint_start",
+    "sprint_end",
+    "quad_id",
+    "quad_name",
+    "quad_start",
+    "quad_end",
+    "deliverable_pillar",
+)
+
+
+@dataclass(slots=True)
 class IssueMetadata:
     """Stores information about issue type and parent (if applicable)"""
 
@@ -50,6 +70,21 @@ class IssueMetadata:
     epic_url: str | None = field(default=None)
     epic_title: str | None = field(default=None)
 
+    def __post_init__(self) -> None:
+        """Intern repeated values so each distinct value is stored once."""
+        for name in INTERNED_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, str):
+                setattr(self, name, sys.intern(value))
+
+    def to_dict(self) -> dict:
+        """Return the issue's fields as a new dict, in declaration order."""
+        return {name: getattr(self, name) for name in ISSUE_FIELDS}
+
+
+# Names of all IssueMetadata fields, in declaration order
+ISSUE_FIELDS = tuple(f.name for f in fields(IssueMetadata))
+
 
 def load_json_file(path: str) -> list[dict]:
     """Load contents of a JSON file into a dictionary."""
@@ -65,6 +100,22 @@ def dump_to_json(path: str, data: dict | list[dict]):
         json.dump(data, f, indent=2, ensure_ascii=False)
 
 
+def tee_to_jsonl(path: str, records: Iterable[dict]) -> Iterator[dict]:
+    """Yield records unchanged, writing each to a JSON Lines file (or stdout if path is "-")."""
+    with open(path, "w") if path != "-" else nullcontext(sys.stdout) as f:
+        for record in records:
+            # Compact separators keep each record on a single short line
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            yield record
+
+
+def dump_to_jsonl(path: str, records: Iterable[dict]) -> None:
+    """Stream records to a JSON Lines file, or stdout if path is "-", one per line."""
+    for _ in tee_to_jsonl(path, records):
+        pass
+
+
 def populate_issue_lookup_table(
     lookup: dict[str, IssueMetadata],
     issues: list[dict],
@@ -76,61 +127,110 @@ def populate_issue_lookup_table(
     return lookup
 
 
-def get_parent_with_type(
-    child_url: str,
+@dataclass(frozen=True, slots=True)
+class IssueAncestors:
+    """Nearest deliverable and epic above an issue"""
+
+    deliverable: IssueMetadata | None = None
+    epic: IssueMetadata | None = None
+
+
+NO_ANCESTORS = IssueAncestors()
+
+
+@dataclass
+class HierarchyReport:
+    """Problems found in the issue hierarchy that need to be fixed in the data"""
+
+    # Each cycle lists issue URLs in child to parent order
+    cycles: list[list[str]] = field(default_factory=list)
+    # Maps parent URLs missing from the lookup table to the issues that point at them
+    orphaned_parents: dict[str, list[str]] = field(default_factory=dict)
+
+    def summary(self) -> list[str]:
+        """Summarize the report in one line per cycle or missing parent."""
+        lines = [
+            f"Cycle of {len(cycle)} issues: {' -> '.join(cycle + cycle[:1])}"
+            for cycle in self.cycles
+        ]
+        lines += [
+            f"Missing parent {parent} referenced by {len(children)} issue(s)"
+            for parent, children in self.orphaned_parents.items()
+        ]
+        return lines
+
+
+def index_issue_ancestors(
     lookup: dict[str, IssueMetadata],
-    type_wanted: IssueType,
-) -> IssueMetadata | None:
+    report: HierarchyReport | None = None,
+) -> dict[str, IssueAncestors]:
     """
-    Traverse the lookup table to find an issue's parent with a specific type.
+    Find the nearest deliverable and epic above every issue in the lookup table.
 
-    This is useful if we have multiple nested issues, and we want to find the
-    top level deliverable or epic that a given task or bug is related to.
+    Each issue is resolved once from its parent's entry, so the cost is linear
+    in the number of issues no matter how deep the hierarchy goes. Cycles and
+    parents missing from the lookup table are added to the report, if given.
     """
-    # Get the initial child issue and its parent (if applicable) from the URL
-    child = lookup.get(child_url)
-    if not child:
-        raise ValueError(f"Lookup doesn't contain issue with url: {child_url}")
-    if not child.issue_parent:
-        return None
-
-    # Travel up the issue hierarchy until we:
-    #  - Find a parent issue with a "Deliverable" type
-    #  - Get to an issue without a parent
-    #  - Have traversed 5 issues (breaks out of issue cycles)
-    parent_url = child.issue_parent
-    for _ in range(5):
-        parent = lookup.get(parent_url)
-        # If no parent is found, return None
-        if not parent:
-            return None
-        # If the parent matches the desired type, return it
-        if IssueType(parent.issue_type) == type_wanted:
-            return parent
-        # If the parent doesn't have a its own parent, return None
-        if not parent.issue_parent:
-            return None
-        # Otherwise update the parent_url to "grandparent" and continue
-        parent_url = parent.issue_parent
-
-    # Return the URL of the parent deliverable (or None)
-    return None
-
-
-def flatten_issue_data(lookup: dict[str, IssueMetadata]) -> list[dict]:
+    issue_types = {url: IssueType(issue.issue_type) for url, issue in lookup.items()}
+    # Resolved issues, and the position of issues on the path being walked
+    ancestors: dict[str, IssueAncestors] = {}
+    visiting: dict[str, int] = {}
+    for url in lookup:
+        if url in ancestors:
+            continue
+
+        # Walk up the issue hierarchy until we get to an issue that is already
+        # resolved, an issue without a parent, or an issue already on this path
+        path: list[str] = []
+        node = url
+        while node in lookup and node not in ancestors and node not in visiting:
+            visiting[node] = len(path)
+            path.append(node)
+            node = lookup[node].issue_parent
+        if node and node not in lookup and report is not None:
+            report.orphaned_parents.setdefault(node, []).append(path[-1])
+
+        # Resolve the path from the top down, so each parent is resolved first.
+        # Issues in a cycle are resolved twice: the first pass around the cycle
+        # starts without ancestors, the second pass sees the whole cycle.
+        order = path[::-1]
+        if node in visiting:
+            cycle = path[visiting[node]:]
+            order = cycle[::-1] + order
+            if report is not None:
+                report.cycles.append(cycle)
+        for node in order:
+            parent_url = lookup[node].issue_parent
+            parent = lookup.get(parent_url) if parent_url else None
+            if not parent:
+                ancestors[node] = NO_ANCESTORS
+                continue
+            above = ancestors.get(parent_url, NO_ANCESTORS)
+            parent_type = issue_types[parent_url]
+            ancestors[node] = IssueAncestors(
+                deliverable=parent if parent_type == IssueType.DELIVERABLE else above.deliverable,
+                epic=parent if parent_type == IssueType.EPIC else above.epic,
+            )
+        for node in path:
+            del visiting[node]
+
+    return ancestors
+
+
+def flatten_issue_data(
+    lookup: dict[str, IssueMetadata],
+    report: HierarchyReport | None = None,
+) -> Iterator[dict]:
     """Flatten issue data and inherit data from parent epic an deliverable."""
-    result: list[dict] = []
+    ancestors = index_issue_ancestors(lookup, report)
     for issue in lookup.values():
         # If the issue is a deliverable or epic, move to the next one
         if IssueType(issue.issue_type) in [IssueType.DELIVERABLE, IssueType.EPIC]:
             continue
 
         # Get the parent deliverable, if the issue has one
-        deliverable = get_parent_with_type(
-            child_url=issue.issue_url,
-            lookup=lookup,
-            type_wanted=IssueType.DELIVERABLE,
-        )
+        parents = ancestors[issue.issue_url]
+        deliverable = parents.deliverable
         if deliverable:
             # Set deliverable metadata
             issue.deliverable_title = deliverable.issue_title
@@ -144,38 +244,50 @@ def flatten_issue_data(lookup: dict[str, IssueMetadata]) -> list[dict]:
             issue.quad_length = deliverable.quad_length
 
         # Get the parent epic, if the issue has one
-        epic = get_parent_with_type(
-            child_url=issue.issue_url,
-            lookup=lookup,
-            type_wanted=IssueType.EPIC,
-        )
+        epic = parents.epic
         if epic:
             issue.epic_title = epic.issue_title
             issue.epic_url = epic.issue_url
 
-        # Add the issue to the results
-        result.append(issue.__dict__)
+        # Yield the issue as soon as it is flattened
+        yield issue.to_dict()
 
-    # Return the results
-    return result
+
+def transform_issue_data(
+    sprint_file_in: str,
+    roadmap_file_in: str,
+    report: HierarchyReport | None = None,
+) -> Iterator[dict]:
+    """Transform exported issue data into task-level records, yielded one at a time."""
+    # Populate a lookup table with roadmap and sprint data, loading one file
+    # at a time so the raw data can be freed once it is in the lookup
+    lookup = {}
+    lookup = populate_issue_lookup_table(lookup, load_json_file(roadmap_file_in))
+    lookup = populate_issue_lookup_table(lookup, load_json_file(sprint_file_in))
+    # Flatten issue level data
+    return flatten_issue_data(lookup, report)
 
 
 def run_transformations(
     sprint_file_in: str,
     roadmap_file_in: str,
     task_file_out: str,
+    report_file_out: str | None = None,
+    task_format: str = "jsonl",
 ) -> None:
     """Runs a transformation pipeline to transform issue data to the correct format."""
-    # Load sprint and roadmap data
-    sprint_data_in = load_json_file(sprint_file_in)
-    roadmap_data_in = load_json_file(roadmap_file_in)
-    # Populate a lookup table with this data
-    lookup = {}
-    lookup = populate_issue_lookup_table(lookup, roadmap_data_in)
-    lookup = populate_issue_lookup_table(lookup, sprint_data_in)
-    # Flatten and write issue level data to output file
-    tasks_out = flatten_issue_data(lookup)
-    dump_to_json(task_file_out, tasks_out)
+    # Transform and write issue level data to output file
+    report = HierarchyReport()
+    tasks_out = transform_issue_data(sprint_file_in, roadmap_file_in, report)
+    if task_format == "json":
+        dump_to_json(task_file_out, list(tasks_out))
+    else:
+        dump_to_jsonl(task_file_out, tasks_out)
+    # Report problems in the issue hierarchy
+    for line in report.summary():
+        print(line, file=sys.stderr)
+    if report_file_out:
+        dump_to_json(report_file_out, asdict(report))
 
 
 if __name__ == "__main__":
@@ -196,7 +308,17 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--task-file-out",
-        help="Path to output location for JSON of tasks",
+        help="Path to output location for tasks, or - for stdout",
+    )
+    parser.add_argument(
+        "--task-format",
+        choices=["jsonl", "json"],
+        default="jsonl",
+        help="Write tasks as JSON Lines (default) or as pretty-printed JSON for debugging",
+    )
+    parser.add_argument(
+        "--report-file-out",
+        help="Path to output location for JSON of cycles and missing parents",
     )
     # Parse arguments from the CLI
     args = parser.parse_args()
@@ -205,4 +327,6 @@ if __name__ == "__main__":
         sprint_file_in=args.sprint_file_in,
         roadmap_file_in=args.roadmap_file_in,
         task_file_out=args.task_file_out,
+        report_file_out=args.report_file_out,
+        task_format=args.task_format,
     )
@@ -40,6 +40,11 @@ while [[ $# -gt 0 ]]; do
       shift # past argument
       shift # past value
       ;;
+    --db)
+      db_path="$2"
+      shift # past argument
+      shift # past value
+      ;;
     -*|--*)
       echo "Unknown option $1"
       exit 1
@@ -58,9 +63,10 @@ done
 mkdir -p tmp
 roadmap_items_file="./tmp/roadmap-export.json"
 sprint_items_file="./tmp/sprint-export.json"
-tasks_file="./tmp/task-level-issues.json"
+tasks_file="./tmp/task-level-issues.jsonl"
 epics_file="./tmp/epic-level-issues.json"
 deliverables_file="./tmp/deliverable-level-issues.json"
+report_file="./tmp/hierarchy-report.json"
 root="./linters/export_delivery_data"
 roadmap_query=$(cat "${root}/getRoadmapData.graphql")
 sprint_query=$(cat "${root}/getSprintData.graphql")
@@ -162,7 +168,19 @@ gh api graphql \
 # Transform the exported data
 # #######################################################
 
-python "${root}/join_parent_issues.py" \
- --sprint-file-in $sprint_items_file \
- --roadmap-file-in $roadmap_items_file \
- --task-file-out $tasks_file
+# with --db, load the transformed data into the delivery metrics database in
+# the same process, keeping the task file only as an audit copy
+if [[ -n $db_path ]]; then
+  python ./delivery-metrics/src/loader/load_export.py \
+   --sprint-file-in $sprint_items_file \
+   --roadmap-file-in $roadmap_items_file \
+   --task-file-out $tasks_file \
+   --report-file-out $report_file \
+   --db $db_path
+else
+  python "${root}/join_parent_issues.py" \
+   --sprint-file-in $sprint_items_file \
+   --roadmap-file-in $roadmap_items_file \
+   --task-file-out $tasks_file \
+   --report-file-out $report_file
+fi